@@ -0,0 +1,15 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from foodgram.hashers import HashingTimeoutError
+
+
+def exception_handler(exc, context):
+    if isinstance(exc, HashingTimeoutError):
+        return Response(
+            {'errors': 'Сервер перегружен, повторите попытку позже'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '1'},
+        )
+    return drf_exception_handler(exc, context)
@@ -0,0 +1,26 @@
+import base64
+import binascii
+import uuid
+
+from django.core.files.base import ContentFile
+from rest_framework import serializers
+
+
+class Base64ImageField(serializers.ImageField):
+    """ImageField that accepts images as base64 data URIs.
+
+    Only the standard library is used to decode the data, and Pillow is
+    imported by Django's image validation on first use rather than when
+    the serializers module loads.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            header, _, encoded = data.rpartition(';base64,')
+            try:
+                content = base64.b64decode(encoded, validate=True)
+            except (binascii.Error, ValueError):
+                self.fail('invalid_image')
+            extension = header.rpartition('/')[2] or 'jpg'
+            data = ContentFile(content, name=f'{uuid.uuid4().hex}.{extension}')
+        return super().to_internal_value(data)
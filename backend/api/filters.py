@@ -1,8 +1,14 @@
 import django_filters as filters
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django_filters.fields import MultipleChoiceField
+from django.db.models import Case, F, IntegerField, Q, When
+from django_filters.fields import BaseCSVField, MultipleChoiceField
 
-from recipes.models import Ingredient, Recipe
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+RECIPE_IDS_MAX = 100
 
 
 class IngredientFilter(filters.FilterSet):
@@ -13,6 +19,19 @@ class IngredientFilter(filters.FilterSet):
         fields = ('name',)
 
 
+class UserFilter(filters.FilterSet):
+    search = filters.CharFilter(method='filter_search')
+
+    class Meta:
+        model = User
+        fields = ('search',)
+
+    def filter_search(self, queryset, name, value):
+        return queryset.filter(
+            Q(username__istartswith=value) | Q(email__istartswith=value)
+        )
+
+
 class TagsMultipleChoiceField(MultipleChoiceField):
     def validate(self, value):
         if self.required and not value:
@@ -27,17 +46,87 @@ class TagsMultipleChoiceField(MultipleChoiceField):
                 )
 
 
-class TagsFilter(filters.AllValuesMultipleFilter):
+def tag_choices():
+    return [(tag['slug'], tag['name']) for tag in Tag.catalog()]
+
+
+class TagsFilter(filters.MultipleChoiceFilter):
     field_class = TagsMultipleChoiceField
 
 
+class LimitedCSVField(BaseCSVField):
+    def __init__(self, *args, max_values=None, **kwargs):
+        self.max_values = max_values
+        super().__init__(*args, **kwargs)
+
+    def clean(self, value):
+        value = super().clean(value)
+        if (
+            value is not None
+            and self.max_values is not None
+            and len(value) > self.max_values
+        ):
+            raise ValidationError(
+                f'Не больше {self.max_values} значений',
+                code='max_values',
+            )
+        return value
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    base_field_class = LimitedCSVField
+
+
 class RecipeFilter(filters.FilterSet):
-    is_favorited = filters.BooleanFilter(field_name='is_favorited')
+    ids = NumberInFilter(method='filter_ids', max_values=RECIPE_IDS_MAX)
+    is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
-        field_name='is_in_shopping_cart'
+        method='filter_is_in_shopping_cart'
     )
-    tags = TagsFilter(field_name='tags__slug')
+    tags = TagsFilter(choices=tag_choices, method='filter_tags')
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags',)
+        fields = (
+            'ids', 'is_favorited', 'is_in_shopping_cart', 'author', 'tags',
+        )
+
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_relation(
+            queryset, name, value, 'favorite_recipe', 'favorited'
+        )
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_relation(
+            queryset, name, value, 'shopping_cart', 'added_to_cart'
+        )
+
+    def filter_relation(self, queryset, name, value, relation, ordering):
+        """Start from the user's relation rows instead of every recipe.
+
+        Joining the relation lets the database walk the user's
+        (user, created) index, where filtering on the Exists annotation
+        makes it probe every recipe until a page is filled. With
+        ?ordering=<ordering> recipes come newest added first.
+        """
+        user = self.request.user
+        if not value or not user.is_authenticated:
+            return queryset.filter(**{name: value})
+        queryset = queryset.filter(**{f'{relation}__user': user})
+        if self.request.query_params.get('ordering') != ordering:
+            return queryset
+        return queryset.order_by(f'-{relation}__created', '-id')
+
+    def filter_tags(self, queryset, name, value):
+        mask = Tag.mask(value)
+        if not mask:
+            return queryset.none()
+        return queryset.alias(
+            tag_hits=F('tag_mask').bitand(mask)
+        ).filter(tag_hits__gt=0)
+
+    def filter_ids(self, queryset, name, value):
+        return queryset.filter(id__in=value).order_by(Case(
+            *(When(id=pk, then=position) for position, pk in enumerate(value)),
+            output_field=IntegerField(),
+        ))
@@ -0,0 +1,71 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from jobs.registry import register
+from recipes.models import Recipe, ShoppingCart, ShoppingListItem
+
+from .utils import SHOPPING_CART_PDF, draw_shopping_cart
+
+DELETE_RECIPE = 'delete_recipe'
+DELETE_USER = 'delete_user'
+
+User = get_user_model()
+
+
+def delete_recipe(recipe):
+    with transaction.atomic(), ShoppingListItem.tracking(recipe):
+        recipe.delete()
+
+
+def delete_account(user_id):
+    """Delete a user, removing their recipes in batches first.
+
+    Every batch is committed on its own, so a retry after a failure picks
+    up the recipes that are left.
+    """
+    recipes = Recipe.objects.filter(author_id=user_id).values_list(
+        'id', flat=True
+    )
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            recipe_ids = list(recipes[:settings.JOBS_DELETE_BATCH_SIZE])
+            if not recipe_ids:
+                break
+            user_ids = list(ShoppingCart.objects.filter(
+                recipe_id__in=recipe_ids
+            ).values_list('user_id', flat=True).distinct())
+            Recipe.objects.filter(id__in=recipe_ids).delete()
+            ShoppingListItem.rebuild(user_ids)
+        deleted += len(recipe_ids)
+    with transaction.atomic():
+        User.objects.filter(pk=user_id).delete()
+    return deleted
+
+
+@register(SHOPPING_CART_PDF)
+def shopping_cart_pdf(job):
+    output = BytesIO()
+    draw_shopping_cart(job.user, output)
+    job.result_file.save(
+        'shoppingcart.pdf', ContentFile(output.getvalue()), save=False
+    )
+
+
+@register(DELETE_RECIPE)
+def delete_recipe_job(job):
+    recipe = Recipe.objects.filter(pk=job.payload['recipe_id']).first()
+    if recipe is not None:
+        delete_recipe(recipe)
+    return {'deleted': recipe is not None}
+
+
+@register(DELETE_USER)
+def delete_user_job(job):
+    deleted = delete_account(job.payload['user_id'])
+    job.user = None
+    return {'deleted_recipes': deleted}
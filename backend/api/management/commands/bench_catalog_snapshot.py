@@ -0,0 +1,145 @@
+import multiprocessing
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from recipes.models import Ingredient
+from recipes.snapshot import CatalogSnapshot, build_snapshot
+
+MEMORY_FIELDS = (
+    ('/proc/self/status', 'VmRSS:', 'rss'),
+    ('/proc/self/smaps_rollup', 'Pss:', 'pss'),
+)
+
+
+def memory():
+    """Resident and proportional set size of this process in kB."""
+    sizes = {}
+    for path, field, name in MEMORY_FIELDS:
+        try:
+            with open(path) as file:
+                for line in file:
+                    if line.startswith(field):
+                        sizes[name] = int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return sizes
+
+
+class QuerySetCatalog:
+    """Catalog copied into every worker, as a per-process cache would."""
+
+    def __init__(self):
+        self.rows = list(Ingredient.objects.order_by('id').values(
+            'id', 'name', 'measurement_unit'
+        ))
+        self.by_id = {row['id']: row for row in self.rows}
+        connections.close_all()
+
+    def ingredient(self, pk):
+        return self.by_id.get(pk)
+
+    def ingredients(self, prefix):
+        prefix = prefix.upper()
+        return [
+            row for row in self.rows if row['name'].upper().startswith(prefix)
+        ]
+
+
+def run_worker(mode, path, ids, prefixes, barrier, results):
+    before = memory()
+    if mode == 'snapshot':
+        catalog = CatalogSnapshot(path)
+        # Touch every page, like a worker that served the whole catalog.
+        catalog.ingredients()
+    else:
+        catalog = QuerySetCatalog()
+    barrier.wait()
+    after = memory()
+    barrier.wait()
+    timings = {'id': [], 'prefix': []}
+    for kind, lookup, keys in (
+        ('id', catalog.ingredient, ids),
+        ('prefix', catalog.ingredients, prefixes),
+    ):
+        for key in keys:
+            started = time.perf_counter()
+            lookup(key)
+            timings[kind].append(time.perf_counter() - started)
+    results.put({
+        'memory': {
+            name: after[name] - before.get(name, 0) for name in after
+        },
+        'id': statistics.median(timings['id']),
+        'prefix': statistics.median(timings['prefix']),
+    })
+
+
+class Command(BaseCommand):
+    help = 'Memory per worker and lookup latency, copied catalog vs mmap'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='processes holding the catalog at once')
+        parser.add_argument('--lookups', type=int, default=10000)
+
+    def handle(self, *args, workers, lookups, **options):
+        ingredients = list(Ingredient.objects.values_list('id', 'name'))
+        if not ingredients:
+            raise CommandError('No ingredients, run load_ingredients first')
+        ids = [random.choice(ingredients)[0] for _ in range(lookups)]
+        prefixes = [
+            random.choice(ingredients)[1][:2] for _ in range(lookups // 10)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'catalog.bin'
+            size = build_snapshot(path)
+            self.stdout.write(
+                f'{len(ingredients)} ingredients, snapshot {size} bytes'
+            )
+            # Children open their own connections after the fork.
+            connections.close_all()
+            for mode in ('queryset', 'snapshot'):
+                self.report(mode, self.run(
+                    mode, path, ids, prefixes, workers
+                ))
+
+    def run(self, mode, path, ids, prefixes, workers):
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=run_worker, args=(
+                mode, path, ids, prefixes, barrier, results
+            ))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            return [results.get() for _ in processes]
+        finally:
+            for process in processes:
+                process.join()
+
+    def report(self, mode, reports):
+        memory = ', '.join(
+            f'{name} +{size:.0f} kB' for name, size in (
+                (name, statistics.mean(
+                    report['memory'][name] for report in reports
+                ))
+                for name in reports[0]['memory']
+            )
+        )
+        by_id = statistics.mean(report['id'] for report in reports)
+        by_prefix = statistics.mean(report['prefix'] for report in reports)
+        self.stdout.write(
+            f'{mode:>8}: per worker {memory}; median lookup by id '
+            f'{by_id * 1e6:.2f} us, by prefix {by_prefix * 1e6:.1f} us'
+        )
@@ -0,0 +1,73 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from foodgram.db.postgresql.base import DatabaseWrapper
+from foodgram.db.postgresql.pool import ConnectionPool
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request connection cost with and without the pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'postgresql':
+            raise CommandError('Benchmark needs a PostgreSQL database')
+        params = connection.get_connection_params()
+
+        def connect():
+            return DatabaseWrapper.connect_new(params)
+
+        def direct_request():
+            conn = connect()
+            self.query(conn)
+            conn.close()
+
+        pool = ConnectionPool(connect, max_size=1)
+
+        def pooled_request():
+            conn = pool.acquire()
+            self.query(conn)
+            pool.release(conn)
+
+        direct = self.measure(direct_request, options['requests'])
+        pooled = self.measure(pooled_request, options['requests'])
+        pool.close_all()
+
+        self.report('new connection', direct)
+        self.report('pooled', pooled)
+        saved = statistics.mean(direct) - statistics.mean(pooled)
+        self.stdout.write(self.style.SUCCESS(
+            f'saved per request: {saved * 1000:.3f} ms'
+        ))
+        self.stdout.write(f'pool stats: {pool.stats()}')
+
+    @staticmethod
+    def query(conn):
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        conn.rollback()
+
+    @staticmethod
+    def measure(request, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            request()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def report(self, name, timings):
+        timings = sorted(timings)
+        self.stdout.write(
+            f'{name:>15}: mean {statistics.mean(timings) * 1000:.3f} ms, '
+            f'p50 {timings[len(timings) // 2] * 1000:.3f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95)] * 1000:.3f} ms'
+        )
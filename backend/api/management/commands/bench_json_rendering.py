@@ -0,0 +1,95 @@
+import timeit
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = 'Render time and bytes on the wire for recipe list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[6, 50, 200],
+                            help='recipes per page')
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--text-length', type=int, default=1500,
+                            help='characters in each recipe text')
+
+    def handle(self, *args, sizes, repeat, text_length, **options):
+        renderers = (
+            ('json', JSONRenderer()), ('orjson', FastJSONRenderer()),
+        )
+        for size in sizes:
+            page = self.make_page(size, text_length)
+            for name, renderer in renderers:
+                elapsed = min(timeit.repeat(
+                    lambda: renderer.render(page), number=repeat, repeat=3,
+                )) / repeat
+                self.report(size, name, elapsed, renderer.render(page))
+
+    @staticmethod
+    def make_page(size, text_length):
+        """Build a page shaped like RecipeSerializer output."""
+        text = ('Нарезать, смешать и запекать до готовности. ' * (
+            text_length // 44 + 1
+        ))[:text_length]
+        tags = [
+            {'id': pk, 'name': name, 'color': color, 'slug': slug}
+            for pk, (name, color, slug) in enumerate((
+                ('Завтрак', '#E26C2D', 'breakfast'),
+                ('Обед', '#49B64E', 'lunch'),
+            ), 1)
+        ]
+        results = [
+            {
+                'id': number,
+                'image': f'http://localhost/media/recipe/{number}.png',
+                'tags': tags,
+                'author': {
+                    'id': number % 50,
+                    'email': f'cook{number % 50}@example.com',
+                    'username': f'cook{number % 50}',
+                    'first_name': 'Иван',
+                    'last_name': 'Петров',
+                    'is_subscribed': number % 3 == 0,
+                },
+                'ingredients': [
+                    {'id': pk, 'name': f'ингредиент {pk}',
+                     'measurement_unit': 'г', 'amount': pk * 10}
+                    for pk in range(1, 9)
+                ],
+                'is_favorited': number % 2 == 0,
+                'is_in_shopping_cart': number % 5 == 0,
+                'name': f'Рецепт {number}',
+                'text': text,
+                'cooking_time': 30,
+                'pub_date': timezone.now(),
+            }
+            for number in range(size)
+        ]
+        return {
+            'count': size * 10, 'next': 'http://localhost/api/recipes/?page=2',
+            'previous': None, 'results': results,
+        }
+
+    def report(self, size, name, elapsed, content):
+        line = (
+            f'{size:>4} recipes, {name:>6}: {elapsed * 1000:.3f} ms, '
+            f'{len(content)} B raw, {len(compress_string(content))} B gzip'
+        )
+        if brotli is not None:
+            compressed = brotli.compress(
+                content, quality=settings.COMPRESSION_BROTLI_QUALITY
+            )
+            line += f', {len(compressed)} B br'
+        self.stdout.write(line)
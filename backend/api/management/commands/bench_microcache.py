@@ -0,0 +1,57 @@
+import threading
+import time
+import urllib.request
+from collections import Counter
+
+from django.core.management import BaseCommand, CommandError
+
+# Statuses of nginx's $upstream_cache_status that went to the backend;
+# STALE and UPDATING answers are served from the cache while a single
+# background request refreshes the entry.
+BACKEND_STATUSES = ('MISS', 'EXPIRED', 'BYPASS', 'REVALIDATED')
+
+
+class Command(BaseCommand):
+    help = 'Anonymous burst against nginx, counting requests to the backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1/api/recipes/')
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=10)
+
+    def handle(self, *args, url, clients, duration, **options):
+        deadline = time.monotonic() + duration
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def client():
+            while time.monotonic() < deadline:
+                try:
+                    with urllib.request.urlopen(url) as response:
+                        response.read()
+                        cache_status = response.headers.get(
+                            'X-Cache-Status', 'NONE'
+                        )
+                except OSError:
+                    cache_status = 'ERROR'
+                with lock:
+                    statuses[cache_status] += 1
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = sum(statuses.values())
+        if statuses['NONE'] == total:
+            raise CommandError(
+                'No X-Cache-Status header, is the url served by nginx?'
+            )
+        backend = sum(statuses[name] for name in BACKEND_STATUSES)
+        self.stdout.write(
+            f'{total / duration:.0f} requests/s from clients, '
+            f'{backend / duration:.1f} requests/s reached the backend'
+        )
+        for name, count in statuses.most_common():
+            self.stdout.write(f'{name:>11}: {count}')
@@ -0,0 +1,108 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.management.commands.bench_throttling import WorkerQueue
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Mixed login and read traffic, hashing inline or in the pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=4,
+                            help='clients logging in over and over')
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=8,
+                            help='requests served at once, like gunicorn '
+                                 'worker threads')
+        parser.add_argument('--hash-workers', type=int, default=2)
+        parser.add_argument('--iterations', type=int,
+                            default=settings.PASSWORD_HASHING_ITERATIONS)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--read-url', default='/api/recipes/')
+
+    def handle(self, *args, **options):
+        password = 'bench-password-1'
+        rest_framework = settings.REST_FRAMEWORK
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            PASSWORD_HASHING_ITERATIONS=options['iterations'],
+            REST_FRAMEWORK={
+                **rest_framework,
+                'DEFAULT_THROTTLE_RATES': dict.fromkeys(
+                    rest_framework['DEFAULT_THROTTLE_RATES']
+                ),
+            },
+        ):
+            users = []
+            for number in range(options['logins']):
+                user = User(username=f'bench_hashing_{number}',
+                            email=f'bench_hashing_{number}@example.com')
+                user.set_password(password)
+                users.append(user)
+            User.objects.bulk_create(users)
+            try:
+                for name, workers in (('inline', 0),
+                                      ('pool', options['hash_workers'])):
+                    pool = {
+                        **settings.PASSWORD_HASHING_POOL, 'WORKERS': workers
+                    }
+                    with override_settings(PASSWORD_HASHING_POOL=pool):
+                        self.report(name, *self.run(
+                            users, password, **options
+                        ))
+            finally:
+                User.objects.filter(
+                    username__startswith='bench_hashing_'
+                ).delete()
+
+    def run(self, users, password, threads, duration, read_url, **options):
+        deadline = time.monotonic() + duration
+        workers = WorkerQueue(threads)
+        logins, reads = [], []
+
+        def login(user):
+            api_client = APIClient()
+            while time.monotonic() < deadline:
+                with workers:
+                    api_client.post('/api/auth/token/login/', {
+                        'email': user.email, 'password': password,
+                    })
+                logins.append(1)
+            connection.close()
+
+        def read():
+            api_client = APIClient()
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                with workers:
+                    api_client.get(read_url)
+                reads.append(time.perf_counter() - started)
+            connection.close()
+
+        clients = [
+            threading.Thread(target=login, args=(user,)) for user in users
+        ] + [
+            threading.Thread(target=read) for _ in range(options['readers'])
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        return duration, len(logins), sorted(reads)
+
+    def report(self, name, duration, logins, reads):
+        self.stdout.write(
+            f'{name:>6}: {logins / duration:.1f} logins/s, '
+            f'{len(reads) / duration:.1f} reads/s, read p50 '
+            f'{reads[len(reads) // 2] * 1000:.1f} ms, p95 '
+            f'{reads[int(len(reads) * 0.95)] * 1000:.1f} ms'
+        )
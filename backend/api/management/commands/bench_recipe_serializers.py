@@ -0,0 +1,108 @@
+import json
+import time
+from itertools import cycle, islice
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.serializers import RecipeSerializer
+from api.views import RecipeList
+from recipes.models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'CPU per recipe page: RecipeSerializer against values() rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limits', type=int, nargs='+',
+                            default=[6, 50, 200, 1000])
+        parser.add_argument('--ingredients', type=int, default=8,
+                            help='ingredients per recipe')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def run(self, limits, ingredients, repeat, **options):
+        author = User.objects.create(username='bench_serializer_author',
+                                     email='bench_serializer@example.com')
+        self.create_recipes(author, max(limits), ingredients)
+        django_request = APIRequestFactory().get('/api/recipes/')
+        force_authenticate(django_request, user=author)
+        view = RecipeList()
+        view.setup(django_request)
+        view.request = view.initialize_request(django_request)
+        view.format_kwarg = None
+        queryset = view.get_queryset().filter(author=author).order_by('-id')
+
+        for limit in limits:
+            def serialize():
+                return RecipeSerializer(
+                    queryset[:limit], many=True,
+                    context=view.get_serializer_context(),
+                ).data
+
+            def serialize_values():
+                return view.get_values_serializer(
+                    view.get_values(queryset)[:limit]
+                ).data
+
+            if self.as_json(serialize()) != self.as_json(serialize_values()):
+                raise CommandError(f'Outputs differ for limit {limit}')
+            for name, function in (('serializer', serialize),
+                                   ('values', serialize_values)):
+                self.report(limit, name, self.cpu_time(function, repeat))
+
+    @staticmethod
+    def create_recipes(author, count, per_recipe):
+        ingredient_ids = list(Ingredient.objects.values_list(
+            'id', flat=True
+        )[:100]) or [Ingredient.objects.create(
+            name='bench', measurement_unit='g'
+        ).id]
+        tag_ids = list(Tag.objects.values_list('id', flat=True)[:3])
+        Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'bench {number}',
+                   image='recipe/bench.png', text='bench ' * 200,
+                   cooking_time=1)
+            for number in range(count)
+        )
+        recipe_ids = list(Recipe.objects.filter(
+            author=author
+        ).values_list('id', flat=True))
+        ingredients = cycle(ingredient_ids)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe_id=recipe_id, ingredient_id=pk, amount=1)
+            for recipe_id in recipe_ids
+            for pk in dict.fromkeys(islice(ingredients, per_recipe))
+        )
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids for tag_id in tag_ids
+        )
+
+    @staticmethod
+    def as_json(data):
+        return json.loads(JSONRenderer().render(data))
+
+    @staticmethod
+    def cpu_time(function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.process_time()
+            function()
+            timings.append(time.process_time() - started)
+        return min(timings)
+
+    def report(self, limit, name, elapsed):
+        self.stdout.write(
+            f'limit {limit:>5}, {name:>10}: {elapsed * 1000:.1f} ms CPU, '
+            f'{elapsed / limit * 1e6:.0f} us per recipe'
+        )
@@ -0,0 +1,101 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.filters import RecipeFilter
+from api.views import RecipeList
+from recipes.models import FavoriteRecipe, Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'First page of ?is_favorited=1 for sparse and dense favorites'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=200000)
+        parser.add_argument('--sparse', type=int, default=10,
+                            help='favorites of the sparse user')
+        parser.add_argument('--dense', type=float, default=0.5,
+                            help='share of recipes the dense user favorited')
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def run(self, recipes, sparse, dense, limit, repeat, **options):
+        author = User.objects.create(username='bench_relation_author',
+                                     email='bench_relation@example.com')
+        Recipe.objects.bulk_create(
+            (
+                Recipe(author=author, name=f'bench {number}',
+                       image='recipe/bench.png', text='bench',
+                       cooking_time=1)
+                for number in range(recipes)
+            ),
+            batch_size=5000,
+        )
+        recipe_ids = list(Recipe.objects.filter(
+            author=author
+        ).order_by('id').values_list('id', flat=True))
+        step = max(int(1 / dense), 1) if dense else len(recipe_ids) + 1
+        favorite_sets = (
+            # The oldest recipes sit at the end of the -pub_date order.
+            ('sparse', recipe_ids[:sparse]),
+            ('dense', recipe_ids[::step]),
+        )
+        for number, (name, favorite_ids) in enumerate(favorite_sets):
+            user = User.objects.create(
+                username=f'bench_relation_{name}',
+                email=f'bench_relation_{number}@example.com',
+            )
+            FavoriteRecipe.objects.bulk_create(
+                (FavoriteRecipe(user=user, recipe_id=pk)
+                 for pk in favorite_ids),
+                batch_size=5000,
+            )
+            view = self.make_view(user)
+            for method, queryset in self.querysets(view, limit):
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    list(queryset.all())
+                    timings.append(time.perf_counter() - started)
+                self.stdout.write(
+                    f'{name:>6} ({len(favorite_ids)} favorites), '
+                    f'{method:>8}: median '
+                    f'{statistics.median(timings) * 1000:.2f} ms'
+                )
+
+    @staticmethod
+    def make_view(user):
+        django_request = APIRequestFactory().get(
+            '/api/recipes/', {'is_favorited': 1}
+        )
+        force_authenticate(django_request, user=user)
+        view = RecipeList()
+        view.setup(django_request)
+        view.request = view.initialize_request(django_request)
+        view.format_kwarg = None
+        return view
+
+    @staticmethod
+    def querysets(view, limit):
+        queryset = view.get_queryset().prefetch_related(None)
+        filtered = RecipeFilter(
+            view.request.query_params, queryset=queryset,
+            request=view.request,
+        ).qs
+        return (
+            ('exists', queryset.filter(
+                is_favorited=True
+            ).values_list('id', flat=True)[:limit]),
+            ('join', filtered.values_list('id', flat=True)[:limit]),
+        )
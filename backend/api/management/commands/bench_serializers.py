@@ -0,0 +1,332 @@
+import gc
+import json
+import math
+import platform
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import (RecipeSerializer, SubscribeSerializer,
+                             UserListSerializer)
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Subscribe, Tag
+
+User = get_user_model()
+
+# 1x1 transparent PNG, the smallest image the ImageField accepts.
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAAD'
+    'UlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+# A change smaller than this many standard errors is taken as noise,
+# roughly a 95% two-sided Welch t-test for 20 or more values.
+SIGNIFICANCE = 2.0
+
+
+def prefetched(model, objects):
+    """Queryset whose rows are already loaded, as prefetch_related leaves.
+
+    Stored in ``_prefetched_objects_cache``, related managers return it
+    without a query.
+    """
+    queryset = model._default_manager.all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    return queryset
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+def summary(values):
+    mean = statistics.mean(values)
+    stdev = statistics.stdev(values) if len(values) > 1 else 0.0
+    return mean, stdev
+
+
+class Command(BaseCommand):
+    help = 'Serializer timings on in-memory objects, compared to a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[6, 50],
+                            help='objects per serialized page')
+        parser.add_argument('--ingredients', type=int, nargs='+',
+                            default=[10, 100],
+                            help='ingredients per recipe')
+        parser.add_argument('--validate-ingredients', type=int, nargs='+',
+                            default=[10, 100, 500])
+        parser.add_argument('--values', type=int, default=20,
+                            help='timed samples per benchmark')
+        parser.add_argument('--warmups', type=int, default=2)
+        parser.add_argument('--min-time', type=float, default=0.1,
+                            help='seconds each sample runs at least')
+        parser.add_argument('--benchmark', action='append', default=[],
+                            help='run only benchmarks starting with this')
+        parser.add_argument('--output', help='save results to this file')
+        parser.add_argument('--baseline', help='compare to a saved file')
+        parser.add_argument('--max-slowdown', type=float, default=1.10,
+                            help='fail on significant slowdowns above this')
+
+    def handle(self, *args, **options):
+        # Image urls are built against the request's host.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            self.run(**options)
+
+    def run(self, **options):
+        self.options = options
+        self.results = {}
+        factory = APIRequestFactory()
+        self.request = Request(factory.get('/api/', {'recipes_limit': 3}))
+        self.request.user = self.make_user(0)
+        self.context = {'request': self.request}
+
+        for page in options['pages']:
+            for size in options['ingredients']:
+                recipes = self.make_recipes(page, size)
+                self.bench(
+                    f'recipe_serializer[{page}x{size}]',
+                    lambda recipes=recipes: RecipeSerializer(
+                        recipes, many=True, context=self.context
+                    ).data,
+                )
+            subscriptions = self.make_subscriptions(page)
+            self.bench(
+                f'subscribe_serializer[{page}]',
+                lambda subscriptions=subscriptions: SubscribeSerializer(
+                    subscriptions, many=True, context=self.context
+                ).data,
+            )
+            users = [self.make_user(number) for number in range(page)]
+            self.bench(
+                f'user_list_serializer[{page}]',
+                lambda users=users: UserListSerializer(
+                    users, many=True, context=self.context
+                ).data,
+            )
+        with transaction.atomic():
+            self.bench_validation()
+            transaction.set_rollback(True)
+
+        if options['output']:
+            self.save(options['output'])
+        if options['baseline']:
+            self.compare(options['baseline'])
+
+    def make_user(self, number):
+        user = User(
+            id=number + 1, email=f'cook{number}@example.com',
+            username=f'cook{number}', first_name='Иван', last_name='Петров',
+        )
+        user.is_subscribed = number % 3 == 0
+        return user
+
+    def make_recipes(self, page, size):
+        tags = [
+            Tag(id=1, name='Завтрак', color='#E26C2D', slug='breakfast'),
+            Tag(id=2, name='Обед', color='#49B64E', slug='lunch'),
+        ]
+        ingredients = [
+            Ingredient(id=pk, name=f'ингредиент {pk}', measurement_unit='г')
+            for pk in range(1, size + 1)
+        ]
+        recipes = []
+        for number in range(page):
+            recipe = Recipe(
+                id=number + 1, author=self.make_user(number % 10),
+                name=f'Рецепт {number}', image=f'recipe/{number}.png',
+                text='Нарезать, смешать и запекать до готовности. ' * 30,
+                cooking_time=30, pub_date=timezone.now(),
+            )
+            recipe.is_favorited = number % 2 == 0
+            recipe.is_in_shopping_cart = number % 5 == 0
+            recipe._prefetched_objects_cache = {
+                'tags': prefetched(Tag, tags),
+                'recipe': prefetched(RecipeIngredient, (
+                    RecipeIngredient(id=ingredient.id, ingredient=ingredient,
+                                     amount=ingredient.id * 10)
+                    for ingredient in ingredients
+                )),
+            }
+            recipes.append(recipe)
+        return recipes
+
+    def make_subscriptions(self, page):
+        subscriptions = []
+        for number in range(page):
+            author = self.make_user(number)
+            author._prefetched_objects_cache = {
+                'recipe': prefetched(Recipe, (
+                    Recipe(id=pk, name=f'Рецепт {pk}',
+                           image=f'recipe/{pk}.png', cooking_time=30)
+                    for pk in range(number * 10, number * 10 + 10)
+                )),
+            }
+            subscription = Subscribe(
+                id=number + 1, follower=self.request.user, following=author
+            )
+            subscription.is_subscribed = True
+            subscription.recipes_count = 10
+            subscriptions.append(subscription)
+        return subscriptions
+
+    def bench_validation(self):
+        """Validation looks ingredients and tags up, so it needs rows."""
+        sizes = [
+            size for size in self.options['validate_ingredients']
+            if self.selected(f'recipe_validation[{size}]')
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'bench ingredient {number}',
+                       measurement_unit='г')
+            for number in range(max(sizes, default=0))
+        )
+        ingredients = list(Ingredient.objects.filter(
+            name__startswith='bench ingredient ', measurement_unit='г'
+        ).order_by('id'))
+        tag = Tag(name='bench tag', color='#000001', slug='bench-tag')
+        tag.save()
+        for size in sizes:
+            data = {
+                'name': 'Рецепт', 'text': 'Текст', 'cooking_time': 30,
+                'image': PNG, 'tags': [tag.id],
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 10}
+                    for ingredient in ingredients[:size]
+                ],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                self.validate(data)
+            self.bench(
+                f'recipe_validation[{size}]',
+                lambda data=data: self.validate(data),
+                queries=len(queries),
+            )
+
+    def validate(self, data):
+        serializer = RecipeSerializer(data=dict(data), context=self.context)
+        if not serializer.is_valid():
+            raise CommandError(f'Invalid bench recipe: {serializer.errors}')
+
+    def selected(self, name):
+        prefixes = self.options['benchmark']
+        return not prefixes or name.startswith(tuple(prefixes))
+
+    def bench(self, name, function, queries=0):
+        if not self.selected(name):
+            return
+        if not queries:
+            with CaptureQueriesContext(connection) as captured:
+                function()
+            if captured:
+                raise CommandError(
+                    f'{name} ran {len(captured)} queries, the objects are '
+                    'not fully prefetched'
+                )
+        loops = self.calibrate(function)
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(self.options['warmups']):
+                self.sample(function, loops)
+            values = [
+                self.sample(function, loops)
+                for _ in range(self.options['values'])
+            ]
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self.results[name] = {'loops': loops, 'values': values}
+        mean, stdev = summary(values)
+        line = f'{name}: Mean +- std dev: {format_time(mean)} +- '
+        line += format_time(stdev)
+        if queries:
+            line += f' ({queries} queries)'
+        self.stdout.write(line)
+        if mean and stdev / mean > 0.1:
+            self.stdout.write(self.style.WARNING(
+                f'WARNING: {name} may be unstable, std dev is '
+                f'{stdev / mean:.0%} of the mean'
+            ))
+
+    def calibrate(self, function):
+        """Loops per sample so that a sample lasts at least min-time."""
+        loops = 1
+        while self.sample(function, loops) * loops < self.options['min_time']:
+            loops *= 2
+        return loops
+
+    @staticmethod
+    def sample(function, loops):
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        return (time.perf_counter() - started) / loops
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'metadata': {
+                    'date': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'platform': platform.platform(),
+                },
+                'benchmarks': self.results,
+            }, file, indent=2)
+        self.stdout.write(f'Saved {len(self.results)} benchmarks to {path}')
+
+    def compare(self, path):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['benchmarks']
+        self.stdout.write(f'\nCompared to {path}:')
+        regressions = []
+        for name, result in self.results.items():
+            if name not in baseline:
+                self.stdout.write(f'{name}: not in the baseline')
+                continue
+            old, new = baseline[name]['values'], result['values']
+            (old_mean, old_stdev), (new_mean, new_stdev) = (
+                summary(old), summary(new)
+            )
+            ratio = new_mean / old_mean
+            error = math.sqrt(
+                old_stdev ** 2 / len(old) + new_stdev ** 2 / len(new)
+            )
+            significant = (
+                abs(new_mean - old_mean) > SIGNIFICANCE * error
+            )
+            change = (
+                f'{ratio:.2f}x slower' if ratio >= 1
+                else f'{1 / ratio:.2f}x faster'
+            )
+            line = (
+                f'{name}: {format_time(old_mean)} -> '
+                f'{format_time(new_mean)}: {change}'
+            )
+            if not significant:
+                line += ' (not significant)'
+                self.stdout.write(line)
+            elif ratio > self.options['max_slowdown']:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+        if regressions:
+            raise CommandError(
+                f'Slower than {self.options["max_slowdown"]:.2f}x the '
+                f'baseline: {", ".join(regressions)}'
+            )
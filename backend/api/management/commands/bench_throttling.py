@@ -0,0 +1,128 @@
+import statistics
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+class WorkerQueue:
+    """Serve at most ``workers`` requests at once, first come first served."""
+
+    def __init__(self, workers):
+        self.free = workers
+        self.waiting = deque()
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            if self.free and not self.waiting:
+                self.free -= 1
+                return
+            turn = threading.Event()
+            self.waiting.append(turn)
+        turn.wait()
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            if self.waiting:
+                self.waiting.popleft().set()
+            else:
+                self.free += 1
+
+
+class Command(BaseCommand):
+    help = 'Latency of a normal client while others hammer the PDF export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--abusers', type=int, default=4)
+        parser.add_argument('--workers', type=int, default=2,
+                            help='requests served at once, like gunicorn '
+                                 'sync workers')
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument('--rate', default='2/s',
+                            help='shopping cart PDF rate while throttled')
+        parser.add_argument('--abused-url',
+                            default='/api/recipes/download_shopping_cart/')
+        parser.add_argument('--normal-url', default='/api/recipes/')
+        parser.add_argument('--interval', type=float, default=0.05,
+                            help='pause between normal client requests')
+
+    def handle(self, *args, **options):
+        User.objects.bulk_create(
+            User(username=f'bench_throttle_{number}',
+                 email=f'bench_throttle_{number}@example.com')
+            for number in range(options['abusers'] + 1)
+        )
+        bench_users = User.objects.filter(
+            username__startswith='bench_throttle_'
+        )
+        users = list(bench_users.order_by('id'))
+        rest_framework = settings.REST_FRAMEWORK
+        try:
+            for name, rate in (('off', None), ('on', options['rate'])):
+                rates = {
+                    **rest_framework['DEFAULT_THROTTLE_RATES'],
+                    'shopping_cart_pdf': rate,
+                }
+                with override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                    REST_FRAMEWORK={
+                        **rest_framework, 'DEFAULT_THROTTLE_RATES': rates
+                    },
+                ):
+                    normal, abused = self.run(users, **options)
+                self.report(f'throttling {name}', normal, abused)
+        finally:
+            bench_users.delete()
+
+    def run(self, users, workers, duration, abused_url, normal_url,
+            interval, **options):
+        deadline = time.monotonic() + duration
+        workers = WorkerQueue(workers)
+        normal, abused = [], Counter()
+
+        def get(user, url):
+            api_client = APIClient()
+            api_client.force_authenticate(user)
+            with workers:
+                return api_client.get(url)
+
+        def abuse(user):
+            while time.monotonic() < deadline:
+                abused[get(user, abused_url).status_code] += 1
+            connection.close()
+
+        def browse(user):
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                get(user, normal_url)
+                normal.append(time.perf_counter() - started)
+                time.sleep(interval)
+            connection.close()
+
+        threads = [threading.Thread(target=browse, args=(users[0],))] + [
+            threading.Thread(target=abuse, args=(user,)) for user in users[1:]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return normal, abused
+
+    def report(self, name, timings, statuses):
+        timings = sorted(timings)
+        self.stdout.write(
+            f'{name:>14}: normal client mean '
+            f'{statistics.mean(timings) * 1000:.1f} ms, '
+            f'p50 {timings[len(timings) // 2] * 1000:.1f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95)] * 1000:.1f} ms; '
+            f'abusers got {dict(sorted(statuses.items()))}'
+        )
@@ -0,0 +1,81 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, like a newly forked gunicorn worker that
+# loads the app and serves its first request.
+WORKER_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+from foodgram.wsgi import application
+loaded = time.perf_counter()
+from django.test import Client
+response = Client(HTTP_HOST=sys.argv[2]).get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({
+    'load': loaded - started,
+    'first_request': served - loaded,
+    'status': response.status_code,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Import time per module and time to first request of a worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tags/',
+                            help='URL of the first request')
+        parser.add_argument('--limit', type=int, default=20,
+                            help='modules and packages to list')
+
+    def handle(self, *args, path, limit, **options):
+        if sys.version_info < (3, 7):
+            raise CommandError('Needs Python 3.7+ for -X importtime')
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*'),
+            'localhost',
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', WORKER_SCRIPT,
+             path, host],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=settings.BASE_DIR,
+            universal_newlines=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = self.parse_importtime(result.stderr)
+
+        self.stdout.write(
+            f'app loaded in {timings["load"] * 1000:.0f} ms, first request '
+            f'to {path} ({timings["status"]}) in '
+            f'{timings["first_request"] * 1000:.0f} ms, '
+            f'imports {sum(modules.values()) / 1000:.0f} ms in total'
+        )
+        packages = defaultdict(int)
+        for module, self_time in modules.items():
+            packages[module.partition('.')[0]] += self_time
+        for title, times in (('packages', packages), ('modules', modules)):
+            self.stdout.write(f'\nslowest {title}, own import time:')
+            for name, self_time in sorted(
+                times.items(), key=lambda item: item[1], reverse=True
+            )[:limit]:
+                self.stdout.write(f'{self_time / 1000:>9.1f} ms  {name}')
+
+    @staticmethod
+    def parse_importtime(output):
+        """Map module name to its own import time in microseconds."""
+        modules = {}
+        for line in output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            self_time, _, name = line[len('import time:'):].split('|')
+            if self_time.strip().isdigit():
+                modules[name.strip()] = int(self_time)
+        return modules
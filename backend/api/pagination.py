@@ -1,6 +1,131 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.models import FeedEntry
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class RankingPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-rank', '-id')
+
+
+class RankedRecipes:
+    """Snapshot ranking with the queryset methods RankingPagination uses.
+
+    Items are ``{'rank': score, 'id': recipe_id}`` dicts in the order of
+    RankingPagination, so a cursor from a page read from the database
+    works on the snapshot and the other way round.
+    """
+
+    def __init__(self, ranking, start=0, stop=None, reverse=False):
+        self.ranking = ranking
+        self.start = start
+        self.stop = len(ranking) if stop is None else stop
+        self.reverse = reverse
+
+    def order_by(self, *ordering):
+        return RankedRecipes(
+            self.ranking, self.start, self.stop,
+            reverse=not ordering[0].startswith('-'),
+        )
+
+    def filter(self, rank__lt=None, rank__gt=None):
+        start, stop = self.start, self.stop
+        try:
+            if rank__lt is not None:
+                start = max(start, self.ranking.count_above(
+                    float(rank__lt), inclusive=True
+                ))
+            if rank__gt is not None:
+                stop = min(stop, self.ranking.count_above(float(rank__gt)))
+        except ValueError:
+            raise NotFound(RankingPagination.invalid_cursor_message)
+        return RankedRecipes(self.ranking, start, max(start, stop),
+                             self.reverse)
+
+    def __getitem__(self, index):
+        first, last = index.start or 0, index.stop
+        if self.reverse:
+            items = self.ranking[
+                max(self.stop - last, self.start):self.stop - first
+            ][::-1]
+        else:
+            items = self.ranking[
+                self.start + first:min(self.start + last, self.stop)
+            ]
+        return [{'rank': score, 'id': pk} for pk, score in items]
+
+
+class UserCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('id',)
+
+
+class FeedPagination(BasePagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_feed(self, request, user):
+        self.request = request
+        page_size = self.get_page_size(request)
+        keys = FeedEntry.page(user, page_size + 1, self.decode_cursor(request))
+        self.next_position = (
+            keys[page_size - 1] if len(keys) > page_size else None
+        )
+        return [recipe_id for _, recipe_id in keys[:page_size]]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            pub_date, recipe_id = urlsafe_b64decode(
+                encoded.encode()
+            ).decode().split('|')
+            position = (parse_datetime(pub_date), int(recipe_id))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        pub_date, recipe_id = self.next_position
+        encoded = urlsafe_b64encode(
+            f'{pub_date.isoformat()}|{recipe_id}'.encode()
+        ).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -3,10 +3,13 @@ from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.hashers import make_password
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
-from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Subscribe, Tag
+from jobs.models import Job
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, RecipeTag,
+                            ShoppingListItem, Subscribe, Tag)
+
+from .fields import Base64ImageField
 
 User = get_user_model()
 
@@ -123,6 +126,13 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class ShoppingListItemSerializer(RecipeIngredientSerializer):
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
 class RecipeUserSerializer(serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField(read_only=True)
@@ -135,6 +145,8 @@ class RecipeUserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
@@ -156,7 +168,10 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        fields = (
+            'id', 'image', 'tags', 'author', 'ingredients', 'is_favorited',
+            'is_in_shopping_cart', 'name', 'text', 'cooking_time', 'pub_date',
+        )
 
     def validate(self, data):
         ingredients = self.initial_data.get('ingredients')
@@ -240,6 +255,94 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
 
 
+class RecipeValuesSerializer:
+    """Read-only RecipeSerializer output built from values() rows.
+
+    ``rows`` come from a recipe queryset annotated with ``is_favorited``
+    and ``is_in_shopping_cart``; ``authors`` is a user queryset annotated
+    with ``is_subscribed``. Tags, ingredients and authors of all rows are
+    fetched in one query each, without building model instances.
+    """
+
+    fields = (
+        'id', 'image', 'author_id', 'is_favorited', 'is_in_shopping_cart',
+        'name', 'text', 'cooking_time', 'pub_date',
+    )
+    author_fields = (
+        'id', 'email', 'username', 'first_name', 'last_name', 'is_subscribed'
+    )
+    pub_date_field = serializers.DateTimeField()
+
+    def __init__(self, rows, authors, context=None):
+        self.rows = list(rows)
+        self.authors = authors
+        self.context = context or {}
+
+    @property
+    def data(self):
+        recipe_ids = [row['id'] for row in self.rows]
+        tags = {pk: [] for pk in recipe_ids}
+        for tag in RecipeTag.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('id').values(
+            'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+        ):
+            tags[tag['recipe_id']].append({
+                'id': tag['tag_id'],
+                'name': tag['tag__name'],
+                'color': tag['tag__color'],
+                'slug': tag['tag__slug'],
+            })
+        ingredients = {pk: [] for pk in recipe_ids}
+        for item in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('id').values(
+            'recipe_id', 'ingredient_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        ):
+            ingredients[item['recipe_id']].append({
+                'id': item['ingredient_id'],
+                'name': item['ingredient__name'],
+                'measurement_unit': item['ingredient__measurement_unit'],
+                'amount': item['amount'],
+            })
+        authors = {
+            author['id']: {
+                **author, 'is_subscribed': bool(author['is_subscribed'])
+            }
+            for author in self.authors.filter(
+                id__in={row['author_id'] for row in self.rows}
+            ).values(*self.author_fields)
+        }
+        return [
+            {
+                'id': row['id'],
+                'image': self.image_url(row['image']),
+                'tags': tags[row['id']],
+                'author': authors[row['author_id']],
+                'ingredients': ingredients[row['id']],
+                'is_favorited': bool(row['is_favorited']),
+                'is_in_shopping_cart': bool(row['is_in_shopping_cart']),
+                'name': row['name'],
+                'text': row['text'],
+                'cooking_time': row['cooking_time'],
+                'pub_date': self.pub_date_field.to_representation(
+                    row['pub_date']
+                ),
+            }
+            for row in self.rows
+        ]
+
+    def image_url(self, name):
+        if not name:
+            return None
+        url = Recipe._meta.get_field('image').storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
 class SubscribeRecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -247,6 +350,14 @@ class SubscribeRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time',)
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=1000,
+    )
+
+
 class SubscribeSerializer(serializers.ModelSerializer):
 
     id = serializers.IntegerField(source='following.id')
@@ -273,3 +384,13 @@ class SubscribeSerializer(serializers.ModelSerializer):
             else obj.following.recipe.all()
         )
         return SubscribeRecipeSerializer(recipes, many=True).data
+
+
+class JobSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'kind', 'status', 'attempts', 'result', 'result_file',
+            'created', 'finished',
+        )
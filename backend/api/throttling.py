@@ -0,0 +1,143 @@
+import os
+import random
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def take_token(state, capacity, rate, now):
+    """Refill a bucket and take one token from it.
+
+    Returns the new ``(tokens, updated)`` state and how many seconds to wait
+    before a token is available (0 when the request is allowed).
+    """
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class CacheBucketStore:
+    """Buckets in the Django cache.
+
+    Shared by all workers only when the cache is; the read-modify-write is
+    not atomic, so concurrent requests may occasionally both get a token.
+    """
+
+    def consume(self, key, capacity, rate, now):
+        state, wait = take_token(cache.get(key), capacity, rate, now)
+        cache.set(key, state, int(capacity / rate) + 1)
+        return wait
+
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite file shared by the workers of one host."""
+
+    prune_probability = 0.001
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, '
+                'tokens REAL NOT NULL, updated REAL NOT NULL, '
+                'full_at REAL NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def consume(self, key, capacity, rate, now):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            state = connection.execute(
+                'SELECT tokens, updated FROM bucket WHERE key = ?', (key,)
+            ).fetchone()
+            (tokens, updated), wait = take_token(state, capacity, rate, now)
+            connection.execute(
+                'INSERT INTO bucket (key, tokens, updated, full_at) '
+                'VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                'tokens = excluded.tokens, updated = excluded.updated, '
+                'full_at = excluded.full_at',
+                (key, tokens, updated, now + (capacity - tokens) / rate),
+            )
+            if random.random() < self.prune_probability:
+                connection.execute(
+                    'DELETE FROM bucket WHERE full_at < ?', (now,)
+                )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait
+
+
+def get_bucket_store():
+    if settings.THROTTLE_BUCKET_PATH:
+        return SQLiteBucketStore(settings.THROTTLE_BUCKET_PATH)
+    return CacheBucketStore()
+
+
+bucket_store = SimpleLazyObject(get_bucket_store)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket per user (or IP for anonymous clients) and scope.
+
+    A rate of ``'10/min'`` allows bursts of 10 requests and then refills
+    one token every 6 seconds.
+    """
+
+    cache_format = 'bucket:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        self.retry_after = bucket_store.consume(
+            key, self.num_requests, self.num_requests / self.duration,
+            self.timer(),
+        )
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
+
+
+class AuthThrottle(TokenBucketThrottle):
+    scope = 'auth'
+
+
+class ShoppingCartPdfThrottle(TokenBucketThrottle):
+    scope = 'shopping_cart_pdf'
+
+
+class RecipeWriteThrottle(TokenBucketThrottle):
+    scope = 'recipe_write'
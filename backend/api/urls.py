@@ -1,11 +1,13 @@
 from django.urls import path
 
 from .utils import download_shopping_cart
-from .views import (AuthToken, FavoriteRecipeDetail, IngredientDetail,
-                    IngredientList, RecipeDetail, RecipeList,
-                    ShoppingCartDetail, SubscribeDetail, SubscribeList,
-                    TagDetail, TagList, UserDetail, UserList, about_me, logout,
-                    set_password)
+from .views import (AuthToken, FavoriteRecipeBatch, FavoriteRecipeDetail,
+                    IngredientDetail, IngredientList, JobDetail, RecipeBulk,
+                    RecipeDetail, RecipeFeed, RecipeList, RecipeRecommended,
+                    RecipeSimilar, ShoppingCartBatch, ShoppingCartDetail,
+                    ShoppingList, SubscribeDetail, SubscribeList, TagDetail,
+                    TagList, UserDetail, UserList, about_me,
+                    clear_shopping_cart, instrumentation, logout, set_password)
 
 urlpatterns = [
 
@@ -29,12 +31,30 @@ urlpatterns = [
          name='ingredient_detail'),
 
     path('recipes/', RecipeList.as_view(), name='recipe_list'),
+    path('recipes/feed/', RecipeFeed.as_view(), name='recipe_feed'),
+    path('recipes/bulk/', RecipeBulk.as_view(), name='recipe_bulk'),
+    path('recipes/recommended/', RecipeRecommended.as_view(),
+         name='recipe_recommended'),
     path('recipes/<int:pk>/', RecipeDetail.as_view(), name='recipe_detail'),
+    path('recipes/<int:pk>/similar/', RecipeSimilar.as_view(),
+         name='recipe_similar'),
     path('recipes/<int:recipe_id>/favorite/', FavoriteRecipeDetail.as_view(),
          name='favorite_recipe'),
     path('recipes/<int:recipe_id>/shopping_cart/',
          ShoppingCartDetail.as_view(),
          name='shopping_cart'),
+    path('recipes/favorite/', FavoriteRecipeBatch.as_view(),
+         name='favorite_recipe_batch'),
+    path('recipes/shopping_cart/', ShoppingCartBatch.as_view(),
+         name='shopping_cart_batch'),
+    path('recipes/shopping_cart/clear/', clear_shopping_cart,
+         name='clear_shopping_cart'),
+    path('recipes/shopping_list/', ShoppingList.as_view(),
+         name='shopping_list'),
     path('recipes/download_shopping_cart/', download_shopping_cart,
          name='download_shopping_cart'),
+
+    path('jobs/<int:pk>/', JobDetail.as_view(), name='job_detail'),
+
+    path('instrumentation/', instrumentation, name='instrumentation'),
 ]
@@ -1,24 +1,39 @@
-from django.db.models.aggregates import Sum
 from django.http import HttpResponse
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-from rest_framework.decorators import api_view
+from rest_framework import status
+from rest_framework.decorators import api_view, throttle_classes
+from rest_framework.response import Response
 
+from jobs.models import Job
 
-@api_view(['GET'])
-def download_shopping_cart(request):
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="shoppingcart.pdf"'
-    p = canvas.Canvas(response)
+from .serializers import JobSerializer
+from .throttling import ShoppingCartPdfThrottle
+
+SHOPPING_CART_PDF = 'shopping_cart_pdf'
+
+
+def wants_async(request):
+    return request.query_params.get('async') in ('1', 'true')
+
+
+def job_response(request, job):
+    serializer = JobSerializer(job, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+def draw_shopping_cart(user, output):
+    # reportlab takes a noticeable part of a worker's start-up, and only
+    # this view needs it.
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+
+    p = canvas.Canvas(output)
     x = 50
     y = 800
     indent = 15
-    shopping_cart = (
-        request.user.shopping_cart.recipe.
-        values('ingredients__name', 'ingredients__measurement_unit').
-        annotate(amount=Sum('recipe__amount')).order_by()
-    )
+    shopping_cart = user.shopping_list.values(
+        'ingredient__name', 'ingredient__measurement_unit', 'amount'
+    ).order_by('ingredient__name')
     pdfmetrics.registerFont(
         TTFont('DejaVuSerif', 'DejaVuSerif.ttf', 'UTF-8')
     )
@@ -26,14 +41,14 @@ def download_shopping_cart(request):
         p.setFont('DejaVuSerif', 24)
         p.drawString(x, y, 'Ваш список покупок пуст')
         p.save()
-        return response
+        return
     p.setFont('DejaVuSerif', 24)
     p.drawString(x, y, 'Ваш список покупок:')
     p.setFont('DejaVuSerif', 16)
     for index, recipe in enumerate(shopping_cart, start=1):
         p.drawString(
-            x, y - indent, f'{index}. {recipe["ingredients__name"]} -'
-            f'{recipe["amount"]} {recipe["ingredients__measurement_unit"]}.'
+            x, y - indent, f'{index}. {recipe["ingredient__name"]} -'
+            f'{recipe["amount"]} {recipe["ingredient__measurement_unit"]}.'
         )
         y -= 15
         if y <= 50:
@@ -41,4 +56,15 @@ def download_shopping_cart(request):
             p.setFont('DejaVuSerif', 16)
             y = 800
     p.save()
+
+
+@api_view(['GET'])
+@throttle_classes([ShoppingCartPdfThrottle])
+def download_shopping_cart(request):
+    if wants_async(request):
+        job = Job.objects.enqueue(SHOPPING_CART_PDF, user=request.user)
+        return job_response(request, job)
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = 'attachment; filename="shoppingcart.pdf"'
+    draw_shopping_cart(request.user, response)
     return response
@@ -1,20 +1,43 @@
+import os
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F, Prefetch
 from django.db.models.aggregates import Count
 from django.db.models.expressions import Exists, OuterRef, Value
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from rest_framework import generics, status
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.decorators import api_view
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.decorators import (api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.permissions import (AllowAny, IsAdminUser,
+                                        IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 
-from api.filters import IngredientFilter, RecipeFilter
+from api.filters import (RECIPE_IDS_MAX, IngredientFilter, RecipeFilter,
+                         UserFilter)
+from api.jobs import DELETE_RECIPE, DELETE_USER, delete_account, delete_recipe
+from api.pagination import (FeedPagination, RankedRecipes, RankingPagination,
+                            UserCursorPagination)
 from api.permissions import IsAuthorOrAdminOrReadOnly
-from recipes.models import (FavoriteRecipe, Ingredient, Recipe, ShoppingCart,
-                            Tag)
-from .serializers import (IngredientSerializer, RecipeSerializer,
+from api.throttling import AuthThrottle, RecipeWriteThrottle
+from api.utils import job_response, wants_async
+from foodgram.db.postgresql.base import pool_stats
+from foodgram.hashers import hashing_stats
+from jobs.models import Job
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe, RecipeActivity,
+                            RecipeIngredient, RecipeNeighbors, RecipeScore,
+                            ShoppingCart, ShoppingListItem, Tag)
+from recipes.snapshot import get_snapshot, snapshot_stats
+
+from .serializers import (IngredientSerializer, JobSerializer,
+                          RecipeIdsSerializer, RecipeSerializer,
+                          RecipeValuesSerializer, ShoppingListItemSerializer,
                           SubscribeRecipeSerializer, SubscribeSerializer,
                           TagSerializer, TokenSerializer, UserCreateSerializer,
                           UserListSerializer, UserPasswordSerializer)
@@ -22,18 +45,57 @@ from .serializers import (IngredientSerializer, RecipeSerializer,
 User = get_user_model()
 
 
-class UserList(generics.ListCreateAPIView):
+class UserQuerySetMixin:
+
+    def get_queryset(self):
+        return User.objects.only(
+            'id', 'email', 'username', 'first_name', 'last_name'
+        ).order_by('id')
+
+    def mark_subscribed(self, users):
+        user = self.request.user
+        subscribed = set()
+        if user.is_authenticated:
+            subscribed = set(user.follower.filter(
+                following__in=[obj.id for obj in users]
+            ).values_list('following_id', flat=True))
+        for obj in users:
+            obj.is_subscribed = obj.id in subscribed
+        return users
+
 
+class UserList(UserQuerySetMixin, generics.ListCreateAPIView):
+
+    filterset_class = UserFilter
     permission_classes = (AllowAny,)
 
-    def get_queryset(self):
-        if not self.request.user.is_authenticated:
-            return User.objects.annotate(is_subscribed=Value(False))
-        return User.objects.annotate(
-            is_subscribed=Exists(self.request.user.follower.filter(
-                following=OuterRef('id')
-            ))
-        ).prefetch_related('follower', 'following')
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = (
+                UserCursorPagination()
+                if 'cursor' in self.request.query_params
+                else self.pagination_class()
+            )
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(
+                self.mark_subscribed(page), many=True
+            )
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(
+            self.mark_subscribed(list(queryset)), many=True
+        )
+        return Response(serializer.data)
+
+    def get_throttles(self):
+        if self.request.method == 'POST':
+            return [AuthThrottle()]
+        return super().get_throttles()
 
     def perform_create(self, serializer):
         password = make_password(self.request.data['password'])
@@ -45,28 +107,37 @@ class UserList(generics.ListCreateAPIView):
         return UserListSerializer
 
 
-class UserDetail(generics.RetrieveAPIView):
+class UserDetail(UserQuerySetMixin, generics.RetrieveAPIView):
 
     serializer_class = UserListSerializer
     permission_classes = (AllowAny,)
 
-    def get_queryset(self):
-        if not self.request.user.is_authenticated:
-            return User.objects.annotate(is_subscribed=Value(False))
-        return User.objects.annotate(
-            is_subscribed=Exists(self.request.user.follower.filter(
-                following=OuterRef('id')
-            ))
-        ).prefetch_related('follower', 'following')
+    def get_object(self):
+        return self.mark_subscribed([super().get_object()])[0]
 
 
-@api_view(['GET'])
+@api_view(['GET', 'DELETE'])
 def about_me(request):
+    if request.method == 'DELETE':
+        return delete_me(request)
     serializer = UserListSerializer(request.user)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def delete_me(request):
+    user = request.user
+    if not wants_async(request):
+        delete_account(user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        Token.objects.filter(user=user).delete()
+        job = Job.objects.enqueue(DELETE_USER, user=user, user_id=user.id)
+    return job_response(request, job)
+
+
 @api_view(['POST'])
+@throttle_classes([AuthThrottle])
 def set_password(request):
     serializer = UserPasswordSerializer(
         data=request.data, context={'request': request}
@@ -81,6 +152,7 @@ class AuthToken(ObtainAuthToken):
 
     serializer_class = TokenSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (AuthThrottle,)
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -99,22 +171,86 @@ def logout(request):
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagList(generics.ListAPIView):
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def instrumentation(request):
+    return Response(
+        {
+            'pid': os.getpid(),
+            'db_pool': pool_stats(),
+            'password_hashing': hashing_stats(),
+            'catalog_snapshot': snapshot_stats(),
+        },
+        status=status.HTTP_200_OK
+    )
+
+
+class PublicCacheMixin:
+    """Let shared caches keep anonymous reads for a few seconds.
+
+    The body depends on the token, so responses vary on Authorization and
+    those of authenticated users stay private.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if request.method not in ('GET', 'HEAD'):
+            return response
+        patch_vary_headers(response, ('Authorization',))
+        if (
+            response.status_code == status.HTTP_200_OK
+            and settings.PUBLIC_CACHE_MAX_AGE
+            and not request.user.is_authenticated
+        ):
+            patch_cache_control(
+                response, public=True,
+                max_age=settings.PUBLIC_CACHE_MAX_AGE,
+                stale_while_revalidate=settings.PUBLIC_CACHE_STALE,
+            )
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SnapshotDetailMixin:
+    """Serve an object from the catalog snapshot when there is one."""
+
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return super().retrieve(request, *args, **kwargs)
+        obj = getattr(snapshot, self.snapshot_lookup)(int(kwargs['pk']))
+        if obj is None:
+            raise Http404
+        return Response(obj)
+
+
+class TagList(PublicCacheMixin, generics.ListAPIView):
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        return Response(snapshot.tags())
+
 
-class TagDetail(generics.RetrieveAPIView):
+class TagDetail(PublicCacheMixin, SnapshotDetailMixin,
+                generics.RetrieveAPIView):
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
+    snapshot_lookup = 'tag'
 
 
-class IngredientList(generics.ListAPIView):
+class IngredientList(PublicCacheMixin, generics.ListAPIView):
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
@@ -122,79 +258,290 @@ class IngredientList(generics.ListAPIView):
     permission_classes = (AllowAny,)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            snapshot.ingredients(request.query_params.get('name', ''))
+        )
+
 
-class IngredientDetail(generics.RetrieveAPIView):
+class IngredientDetail(PublicCacheMixin, SnapshotDetailMixin,
+                       generics.RetrieveAPIView):
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
+    snapshot_lookup = 'ingredient'
 
 
-class RecipeList(generics.ListCreateAPIView):
+class RecipeQuerySetMixin:
 
-    serializer_class = RecipeSerializer
-    filterset_class = RecipeFilter
-    permission_classes = (IsAuthenticatedOrReadOnly,)
+    def get_authors(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return User.objects.annotate(is_subscribed=Value(False))
+        return User.objects.annotate(
+            is_subscribed=Exists(user.follower.filter(
+                following=OuterRef('id')
+            ))
+        )
 
     def get_queryset(self):
-        if not self.request.user.is_authenticated:
-            return Recipe.objects.annotate(
+        user = self.request.user
+        if not user.is_authenticated:
+            recipes = Recipe.objects.annotate(
                 is_in_shopping_cart=Value(False),
                 is_favorited=Value(False),
-            ).select_related(
-                'author'
-            ).prefetch_related(
-                'tags', 'ingredients', 'recipe',
-                'shopping_cart', 'favorite_recipe'
             )
-
-        return Recipe.objects.annotate(
-            is_favorited=Exists(FavoriteRecipe.objects.filter(
-                user=self.request.user, recipe=OuterRef('id'))
+        else:
+            recipes = Recipe.objects.annotate(
+                is_favorited=Exists(FavoriteRecipe.objects.filter(
+                    user=user, recipe=OuterRef('id'))
+                ),
+                is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('id'))
+                )
+            )
+        return recipes.prefetch_related(
+            Prefetch('author', queryset=self.get_authors()),
+            Prefetch(
+                'recipe',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ).order_by('id')
             ),
-            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
-                user=self.request.user, recipe=OuterRef('id'))
+            Prefetch('tags', queryset=Tag.objects.order_by('recipetag__id')),
+        )
+
+    def get_values(self, queryset, *fields):
+        return queryset.prefetch_related(None).values(
+            *RecipeValuesSerializer.fields, *fields
+        )
+
+    def get_values_serializer(self, rows):
+        return RecipeValuesSerializer(
+            rows, self.get_authors(), context=self.get_serializer_context()
+        )
+
+
+class RecipeList(PublicCacheMixin, RecipeQuerySetMixin,
+                 generics.ListCreateAPIView):
+
+    serializer_class = RecipeSerializer
+    filterset_class = RecipeFilter
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def get_throttles(self):
+        if self.request.method == 'POST':
+            return [RecipeWriteThrottle()]
+        return super().get_throttles()
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = (
+                RankingPagination() if self.get_ranking()
+                else self.pagination_class()
             )
-        ).select_related(
-            'author'
-        ).prefetch_related(
-            'tags', 'ingredients', 'recipe',
-            'shopping_cart', 'favorite_recipe'
+        return self._paginator
+
+    def get_ranking(self):
+        ranking = self.request.query_params.get('ordering')
+        return ranking if ranking in RecipeScore.RANKINGS else None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        ranking = self.get_ranking()
+        if ranking is None:
+            return queryset
+        return queryset.filter(score__isnull=False).annotate(
+            rank=F(f'score__{ranking}')
+        )
+
+    def list(self, request, *args, **kwargs):
+        snapshot = get_snapshot() if self.get_ranking() else None
+        if snapshot is not None and not self.is_filtered():
+            return self.list_ranked(snapshot.ranking(self.get_ranking()))
+        queryset = self.filter_queryset(self.get_queryset())
+        ranking = () if self.get_ranking() is None else ('rank',)
+        rows = self.get_values(queryset, *ranking)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_values_serializer(page).data
+            )
+        return Response(self.get_values_serializer(rows).data)
+
+    def is_filtered(self):
+        return not self.filterset_class.base_filters.keys().isdisjoint(
+            self.request.query_params
         )
 
+    def list_ranked(self, ranking):
+        """Page through a ranking of the catalog snapshot.
+
+        Only the recipes of the page are read from the database; recipes
+        deleted since the snapshot was built are left out.
+        """
+        page = self.paginate_queryset(RankedRecipes(ranking))
+        ids = [item['id'] for item in page]
+        rows = {
+            row['id']: row for row in self.get_values(
+                super().get_queryset().filter(id__in=ids)
+            )
+        }
+        return self.get_paginated_response(self.get_values_serializer(
+            [rows[pk] for pk in ids if pk in rows]
+        ).data)
+
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 
-class RecipeDetail(generics.RetrieveUpdateDestroyAPIView):
+class RecipeDetail(PublicCacheMixin, RecipeQuerySetMixin,
+                   generics.RetrieveUpdateDestroyAPIView):
 
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
 
-    def get_queryset(self):
-        if not self.request.user.is_authenticated:
-            return Recipe.objects.annotate(
-                is_in_shopping_cart=Value(False),
-                is_favorited=Value(False),
-            ).select_related(
-                'author'
-            ).prefetch_related(
-                'tags', 'ingredients', 'recipe',
-                'shopping_cart', 'favorite_recipe'
+    def get_throttles(self):
+        if self.request.method in ('PUT', 'PATCH'):
+            return [RecipeWriteThrottle()]
+        return super().get_throttles()
+
+    def retrieve(self, request, *args, **kwargs):
+        # Reading is allowed to everyone, so there are no object
+        # permissions to check against the row.
+        row = get_object_or_404(
+            self.get_values(self.filter_queryset(self.get_queryset())),
+            pk=self.kwargs['pk'],
+        )
+        return Response(self.get_values_serializer([row]).data[0])
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        with ShoppingListItem.tracking(serializer.instance):
+            serializer.save()
+
+    def destroy(self, request, *args, **kwargs):
+        if not wants_async(request):
+            return super().destroy(request, *args, **kwargs)
+        recipe = self.get_object()
+        job = Job.objects.enqueue(
+            DELETE_RECIPE, user=request.user, recipe_id=recipe.id
+        )
+        return job_response(request, job)
+
+    def perform_destroy(self, instance):
+        delete_recipe(instance)
+
+
+class RecipeFeed(RecipeQuerySetMixin, generics.ListAPIView):
+
+    serializer_class = RecipeSerializer
+    pagination_class = FeedPagination
+
+    def list(self, request, *args, **kwargs):
+        recipe_ids = self.paginator.paginate_feed(request, request.user)
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+
+class RecipeBulk(RecipeQuerySetMixin, generics.GenericAPIView):
+
+    serializer_class = RecipeSerializer
+    permission_classes = (AllowAny,)
+    max_ids = RECIPE_IDS_MAX
+
+    def get(self, request, *args, **kwargs):
+        try:
+            recipe_ids = [
+                int(recipe_id)
+                for recipe_id in request.query_params.get('ids', '').split(',')
+                if recipe_id
+            ]
+        except ValueError:
+            return Response(
+                {'errors': 'ids должен быть списком чисел через запятую'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        return Recipe.objects.annotate(
-            is_favorited=Exists(FavoriteRecipe.objects.filter(
-                user=self.request.user, recipe=OuterRef('id'))
-            ),
-            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
-                user=self.request.user, recipe=OuterRef('id'))
+        if not recipe_ids or len(recipe_ids) > self.max_ids:
+            return Response(
+                {'errors': f'Нужно от 1 до {self.max_ids} id рецептов'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        ).select_related(
-            'author'
-        ).prefetch_related(
-            'tags', 'ingredients', 'recipe',
-            'shopping_cart', 'favorite_recipe'
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes], many=True
+        )
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in recipe_ids if pk not in recipes],
+        }, status=status.HTTP_200_OK)
+
+
+class RecipeNeighborsMixin(RecipeQuerySetMixin):
+
+    serializer_class = RecipeSerializer
+    default_limit = 6
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), settings.RECIPE_NEIGHBORS)
+
+    def recipes_response(self, recipe_ids):
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes], many=True
         )
+        return Response({'results': serializer.data})
+
+
+class RecipeSimilar(PublicCacheMixin, RecipeNeighborsMixin,
+                    generics.GenericAPIView):
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request, *args, **kwargs):
+        row = RecipeNeighbors.objects.filter(recipe_id=kwargs['pk']).first()
+        if row is None:
+            get_object_or_404(Recipe.objects.only('id'), pk=kwargs['pk'])
+            return Response({'results': []})
+        return self.recipes_response([
+            recipe_id for recipe_id, _ in row.neighbors()[:self.get_limit()]
+        ])
+
+
+class RecipeRecommended(RecipeNeighborsMixin, generics.GenericAPIView):
+
+    def get(self, request, *args, **kwargs):
+        user, limit = request.user, self.get_limit()
+        seeds = [
+            *user.favorite_recipe.order_by('-created').values_list(
+                'recipe_id', flat=True
+            )[:settings.RECOMMENDATION_SEEDS],
+            *user.shopping_cart.order_by('-created').values_list(
+                'recipe_id', flat=True
+            )[:settings.RECOMMENDATION_SEEDS],
+        ]
+        # Older favorites are not seeds, so a few extra candidates make up
+        # for the ones dropped here.
+        candidates = RecipeNeighbors.recommend(seeds, limit * 2)
+        favorited = set(user.favorite_recipe.filter(
+            recipe_id__in=candidates
+        ).values_list('recipe_id', flat=True))
+        return self.recipes_response([
+            recipe_id for recipe_id in candidates if recipe_id not in favorited
+        ][:limit])
 
 
 class SubscribeList(generics.ListAPIView):
@@ -242,17 +589,21 @@ class SubscribeDetail(generics.RetrieveDestroyAPIView):
                 {'errors': 'Такая подписка существует'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        subs = request.user.follower.create(following=instance)
+        with transaction.atomic():
+            subs = request.user.follower.create(following=instance)
         serializer = self.get_serializer(subs)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
         self.request.user.follower.filter(following=instance).delete()
 
 
-class FavoriteRecipeDetail(generics.RetrieveDestroyAPIView):
+class RecipeRelationDetail(generics.RetrieveDestroyAPIView):
 
     serializer_class = SubscribeRecipeSerializer
+    relation_model = None
+    activity_kind = None
 
     def get_object(self):
         recipe_id = self.kwargs['recipe_id']
@@ -262,29 +613,98 @@ class FavoriteRecipeDetail(generics.RetrieveDestroyAPIView):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        request.user.favorite_recipe.recipe.add(instance)
+        with transaction.atomic():
+            added = self.relation_model.objects.add(request.user, [instance])
+            RecipeActivity.record(request.user, added, self.activity_kind)
         serializer = self.get_serializer(instance)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        self.request.user.favorite_recipe.recipe.remove(instance)
+        self.relation_model.objects.remove(self.request.user, [instance.id])
 
 
-class ShoppingCartDetail(generics.RetrieveDestroyAPIView):
+class FavoriteRecipeDetail(RecipeRelationDetail):
 
-    serializer_class = SubscribeRecipeSerializer
+    relation_model = FavoriteRecipe
+    activity_kind = RecipeActivity.FAVORITE
 
-    def get_object(self):
-        recipe_id = self.kwargs['recipe_id']
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        self.check_object_permissions(self.request, recipe)
-        return recipe
 
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        request.user.shopping_cart.recipe.add(instance)
-        serializer = self.get_serializer(instance)
+class ShoppingCartDetail(RecipeRelationDetail):
+
+    relation_model = ShoppingCart
+    activity_kind = RecipeActivity.SHOPPING_CART
+
+
+class RecipeBatch(generics.GenericAPIView):
+
+    serializer_class = RecipeIdsSerializer
+    relation_model = None
+    activity_kind = None
+
+    def get_recipe_ids(self):
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return set(serializer.validated_data['recipes'])
+
+    def post(self, request, *args, **kwargs):
+        recipe_ids = self.get_recipe_ids()
+        recipes = list(Recipe.objects.filter(id__in=recipe_ids))
+        missing = recipe_ids - {recipe.id for recipe in recipes}
+        if missing:
+            return Response(
+                {'errors': f'рецептов с id = {sorted(missing)} не существует'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with transaction.atomic():
+            added = self.relation_model.objects.add(request.user, recipes)
+            RecipeActivity.record(request.user, added, self.activity_kind)
+        serializer = SubscribeRecipeSerializer(
+            recipes, many=True, context=self.get_serializer_context()
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def perform_destroy(self, instance):
-        self.request.user.shopping_cart.recipe.remove(instance)
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            self.relation_model.objects.remove(
+                request.user, self.get_recipe_ids()
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FavoriteRecipeBatch(RecipeBatch):
+
+    relation_model = FavoriteRecipe
+    activity_kind = RecipeActivity.FAVORITE
+
+
+class ShoppingCartBatch(RecipeBatch):
+
+    relation_model = ShoppingCart
+    activity_kind = RecipeActivity.SHOPPING_CART
+
+
+@api_view(['DELETE'])
+@transaction.atomic
+def clear_shopping_cart(request):
+    ShoppingCart.objects.clear(request.user)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class JobDetail(generics.RetrieveAPIView):
+
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+
+class ShoppingList(generics.ListAPIView):
+
+    serializer_class = ShoppingListItemSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return self.request.user.shopping_list.select_related(
+            'ingredient'
+        ).order_by('ingredient__name')
@@ -0,0 +1,70 @@
+import os
+import threading
+from functools import partial
+
+import psycopg2.extras
+from django.db.backends.postgresql import base
+
+from .pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_stats():
+    return {
+        alias: pool.stats() for (alias, pid), pool in list(_pools.items())
+        if pid == os.getpid()
+    }
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that borrows connections from a process pool.
+
+    Pool limits come from the ``POOL`` key of the database settings.
+    ``CONN_MAX_AGE`` should stay 0: closing a connection at the end of
+    a request returns it to the pool instead of dropping it.
+    """
+
+    def get_pool(self):
+        key = (self.alias, os.getpid())
+        if key not in _pools:
+            with _pools_lock:
+                if key not in _pools:
+                    _pools[key] = self.create_pool()
+        return _pools[key]
+
+    def create_pool(self):
+        options = self.settings_dict.get('POOL', {})
+        return ConnectionPool(
+            partial(self.connect_new, self.get_connection_params()),
+            max_size=options.get('MAX_SIZE', 10),
+            max_idle=options.get('MAX_IDLE', 300),
+            timeout=options.get('TIMEOUT', 10),
+            health_check_interval=options.get('HEALTH_CHECK_INTERVAL', 30),
+        )
+
+    @staticmethod
+    def connect_new(conn_params):
+        connection = base.Database.connect(**conn_params)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool().acquire()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool().release(self.connection)
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import deque
+
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Bounded per-process pool of psycopg2 connections.
+
+    Idle connections are reused last-in first-out, so the oldest ones stay
+    idle and get closed after ``max_idle`` seconds. A connection that was
+    idle longer than ``health_check_interval`` is pinged before reuse.
+    """
+
+    def __init__(self, connect, max_size=10, max_idle=300, timeout=10,
+                 health_check_interval=30):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._counters = dict.fromkeys(
+            ('connects', 'reconnects', 'evicted', 'waits', 'timeouts'), 0
+        )
+        self._wait_time = 0.0
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        with self._condition:
+            self._evict_idle()
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f'No free connection in {self.timeout} seconds'
+                    )
+                if not waited:
+                    self._counters['waits'] += 1
+                    waited = True
+                self._condition.wait(remaining)
+            if self._idle:
+                connection, released_at = self._idle.pop()
+            else:
+                connection, released_at = None, None
+                self._size += 1
+            self._in_use += 1
+            if waited:
+                self._wait_time += time.monotonic() - started
+
+        if connection is not None and not self._is_usable(
+            connection, released_at
+        ):
+            self._close(connection)
+            connection = None
+            self._count('reconnects')
+        if connection is None:
+            try:
+                connection = self.connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._condition.notify()
+                raise
+            self._count('connects')
+        return connection
+
+    def release(self, connection):
+        if not connection.closed:
+            try:
+                if (
+                    connection.get_transaction_status()
+                    != extensions.TRANSACTION_STATUS_IDLE
+                ):
+                    connection.rollback()
+            except Exception:
+                self._close(connection)
+        with self._condition:
+            self._in_use -= 1
+            if connection.closed:
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close_all(self):
+        with self._condition:
+            while self._idle:
+                self._close(self._idle.popleft()[0])
+                self._size -= 1
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'wait_time': round(self._wait_time, 6),
+                **self._counters,
+            }
+
+    def _count(self, name):
+        with self._condition:
+            self._counters[name] += 1
+
+    def _evict_idle(self):
+        expired = time.monotonic() - self.max_idle
+        while self._idle and self._idle[0][1] < expired:
+            self._close(self._idle.popleft()[0])
+            self._size -= 1
+            self._counters['evicted'] += 1
+
+    def _is_usable(self, connection, released_at):
+        if connection.closed:
+            return False
+        if time.monotonic() - released_at < self.health_check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,175 @@
+import random
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, DatabaseError, InterfaceError,
+                       OperationalError, connections)
+from django.db.migrations.recorder import MigrationRecorder
+
+# Per thread, and per request task under ASGI.
+_local = Local()
+
+REPLICA_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+
+@contextmanager
+def use_primary():
+    pinned = getattr(_local, 'pinned_to_primary', False)
+    _local.pinned_to_primary = True
+    try:
+        yield
+    finally:
+        _local.pinned_to_primary = pinned
+
+
+class ReplicaHealth:
+    """Per-process cache of replica availability and replication lag."""
+
+    def __init__(self):
+        self._status = {}
+
+    def is_healthy(self, alias):
+        healthy, checked_at = self._status.get(alias, (True, None))
+        interval = (
+            settings.DATABASE_REPLICA_CHECK_INTERVAL if healthy
+            else settings.DATABASE_REPLICA_RETRY_INTERVAL
+        )
+        now = time.monotonic()
+        if checked_at is None or now - checked_at >= interval:
+            healthy = self.check(alias)
+            self._status[alias] = (healthy, now)
+        return healthy
+
+    def mark_failed(self, alias):
+        self._status[alias] = (False, time.monotonic())
+
+    def is_available(self, alias):
+        """Return whether reads can go to ``alias`` right now.
+
+        A replica that went away since its last check is marked failed
+        here instead of failing the query.
+        """
+        if not self.is_healthy(alias):
+            return False
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            self.mark_failed(alias)
+            return False
+        if fall_back_to_primary not in connection.execute_wrappers:
+            connection.execute_wrappers.append(fall_back_to_primary)
+        return True
+
+    def check(self, alias):
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+            if connection.vendor != 'postgresql':
+                # Replicas are never migrated by allow_migrate, so a copy
+                # without the schema is not a replica.
+                return MigrationRecorder(connection).has_table()
+            with connection.cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                lag = cursor.fetchone()[0]
+        except DatabaseError:
+            connection.close()
+            return False
+        return lag is None or lag <= settings.DATABASE_REPLICA_MAX_LAG
+
+
+replica_health = ReplicaHealth()
+
+
+class FetchedRows:
+    """The rows of a read re-run on the primary, served as a DB-API cursor."""
+
+    def __init__(self, cursor):
+        self.description = cursor.description
+        self.rowcount = cursor.rowcount
+        self.lastrowid = getattr(cursor, 'lastrowid', None)
+        rows = cursor.fetchall() if cursor.description else []
+        self.rows = iter(rows)
+
+    def __iter__(self):
+        return self.rows
+
+    def fetchone(self):
+        return next(self.rows, None)
+
+    def fetchmany(self, size=1):
+        return list(islice(self.rows, size))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+
+def fall_back_to_primary(execute, sql, params, many, context):
+    """Execute wrapper of replica connections.
+
+    A replica that lost its connection is marked failed, so the next reads
+    go to the primary, and the failed read is run there instead. Its rows
+    are fetched through a cursor of the primary and handed to the caller's
+    cursor. Other errors, such as statement timeouts, are raised as is.
+    """
+    try:
+        return execute(sql, params, many, context)
+    except (OperationalError, InterfaceError):
+        replica = context['connection']
+        if replica.is_usable():
+            raise
+    replica_health.mark_failed(replica.alias)
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        if many:
+            cursor.executemany(sql, params)
+        else:
+            cursor.execute(sql, params)
+        context['cursor'].cursor = FetchedRows(cursor)
+    try:
+        replica.close()
+    except DatabaseError:
+        pass
+    return None
+
+
+class PrimaryReplicaRouter:
+    """Send writes to the primary and spread reads over healthy replicas.
+
+    Reads stay on the primary inside transactions and while the current
+    request is pinned by ``use_primary`` (see ``ReplicaPinMiddleware``).
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            not settings.DATABASE_REPLICAS
+            or getattr(_local, 'pinned_to_primary', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        replicas = list(settings.DATABASE_REPLICAS)
+        random.shuffle(replicas)
+        for alias in replicas:
+            if replica_health.is_available(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
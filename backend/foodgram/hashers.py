@@ -0,0 +1,132 @@
+import base64
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class HashingTimeoutError(Exception):
+    pass
+
+
+class HashingPool:
+    """Bounded pool that runs password hashing off the request thread.
+
+    At most ``workers`` hashes run at once and at most ``max_queued`` more
+    wait for a slot; a request that cannot get into the queue within
+    ``timeout`` seconds fails with HashingTimeoutError instead of tying
+    up its worker thread. PBKDF2 releases the GIL, so threads are enough
+    to keep other requests of the same gunicorn worker running.
+    """
+
+    def __init__(self, workers, max_queued=32, timeout=10, kind='thread'):
+        executor_class = (
+            ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+        )
+        self.executor = executor_class(workers)
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters = dict.fromkeys(
+            ('completed', 'timeouts', 'max_pending'), 0
+        )
+        self._queue_time = 0.0
+        self._total_time = 0.0
+
+    def run(self, function, *args):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._counters['timeouts'] += 1
+            raise HashingTimeoutError(
+                f'Password hashing queue is full for {self.timeout} seconds'
+            )
+        with self._lock:
+            self._pending += 1
+            self._counters['max_pending'] = max(
+                self._counters['max_pending'], self._pending
+            )
+            self._queue_time += time.monotonic() - started
+        try:
+            return self.executor.submit(function, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._counters['completed'] += 1
+                self._total_time += time.monotonic() - started
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'running': min(self._pending, self.workers),
+                'queued': max(self._pending - self.workers, 0),
+                'max_queued': self.max_queued,
+                'queue_time': round(self._queue_time, 6),
+                'total_time': round(self._total_time, 6),
+                **self._counters,
+            }
+
+
+def get_pool():
+    """Return this process's hashing pool, or None to hash inline."""
+    options = settings.PASSWORD_HASHING_POOL
+    if not options['WORKERS']:
+        return None
+    key = (os.getpid(), tuple(sorted(options.items())))
+    if key not in _pools:
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = HashingPool(
+                    options['WORKERS'],
+                    max_queued=options.get('MAX_QUEUED', 32),
+                    timeout=options.get('TIMEOUT', 10),
+                    kind=options.get('KIND', 'thread'),
+                )
+    return _pools[key]
+
+
+def hashing_stats():
+    return [
+        pool.stats() for (pid, options), pool in list(_pools.items())
+        if pid == os.getpid()
+    ]
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 hasher that runs in the hashing pool.
+
+    The iteration count comes from ``PASSWORD_HASHING_ITERATIONS``. Hashes
+    made with another count are rehashed on the next successful login,
+    as Django does for any outdated hasher.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        iterations = iterations or self.iterations
+        pool = get_pool()
+        arguments = (
+            self.digest().name, password.encode(), salt.encode(), iterations
+        )
+        digest = (
+            hashlib.pbkdf2_hmac(*arguments) if pool is None
+            else pool.run(hashlib.pbkdf2_hmac, *arguments)
+        )
+        digest = base64.b64encode(digest).decode('ascii').strip()
+        return f'{self.algorithm}${iterations}${salt}${digest}'
@@ -0,0 +1,131 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .db_router import use_primary
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'text/',
+)
+
+
+class ReplicaPinMiddleware:
+    """Read-your-writes: keep a client on the primary right after a write.
+
+    Clients are told apart by their token (or session cookie), so the pin
+    has to live in a cache shared by all workers to survive across them.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = self.get_pin_key(request)
+        is_write = request.method not in SAFE_METHODS
+        pinned = is_write or (key is not None and cache.get(key, False))
+        if pinned:
+            with use_primary():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+
+        if is_write and key is not None and response.status_code < 400:
+            cache.set(key, True, settings.DATABASE_REPLICA_PIN_SECONDS)
+        return response
+
+    def get_pin_key(self, request):
+        credentials = request.META.get('HTTP_AUTHORIZATION') or (
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not credentials:
+            return None
+        digest = hashlib.sha1(credentials.encode()).hexdigest()
+        return f'db-pin:{digest}'
+
+
+def accepted_encodings(header):
+    encodings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[coding.strip().lower()] = quality
+    return encodings
+
+
+class CompressionMiddleware:
+    """Compress large text responses with brotli or gzip.
+
+    The encoding is negotiated from Accept-Encoding, preferring brotli
+    when the package is installed. Bodies smaller than
+    ``COMPRESSION_MIN_SIZE`` are not worth the CPU and are sent as is.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(
+                COMPRESSIBLE_TYPES
+            )
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = self.choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        compressed = self.compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def choose_encoding(header):
+        accepted = accepted_encodings(header)
+        for encoding in ('br', 'gzip'):
+            if encoding == 'br' and brotli is None:
+                continue
+            if accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return None
+
+    @staticmethod
+    def compress(content, encoding):
+        if encoding == 'br':
+            return brotli.compress(
+                content, quality=settings.COMPRESSION_BROTLI_QUALITY
+            )
+        return compress_string(content)
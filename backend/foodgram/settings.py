@@ -20,6 +20,8 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
+    'outbox.apps.OutboxConfig',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -28,6 +30,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.middleware.CompressionMiddleware',
+    'foodgram.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,15 +62,79 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': os.getenv('DB_ENGINE', default='foodgram.db.postgresql'),
         'NAME': os.getenv('DB_NAME', default='foodgram'),
         'USER': os.getenv('POSTGRES_USER', default='foodgram_user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='qqqwwweee'),
         'HOST': os.getenv('DB_HOST', default='127.0.0.1'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=0)),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'MAX_IDLE': int(os.getenv('DB_POOL_MAX_IDLE', default=300)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'HEALTH_CHECK_INTERVAL': 30,
+        },
+    }
+}
+
+# Read replicas: DB_REPLICAS='host1:5432,host2' (file names for SQLite).
+DATABASE_REPLICAS = []
+for number, location in enumerate(filter(None, (
+    location.strip()
+    for location in os.getenv('DB_REPLICAS', default='').split(',')
+)), start=1):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if replica['ENGINE'].endswith('sqlite3'):
+        replica['NAME'] = location
+    else:
+        replica['HOST'], _sep, port = location.partition(':')
+        replica['PORT'] = port or replica['PORT']
+    DATABASES[f'replica_{number}'] = replica
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['foodgram.db_router.PrimaryReplicaRouter']
+
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.getenv('DB_REPLICA_PIN_SECONDS', default=5)
+)
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', default=10))
+DATABASE_REPLICA_CHECK_INTERVAL = 5
+DATABASE_REPLICA_RETRY_INTERVAL = 30
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
     }
 }
 
+# Passwords are hashed in a bounded per-process pool (WORKERS=0 hashes
+# inline). Changing PASSWORD_HASHER or the iteration count rehashes a
+# password on the next successful login.
+PASSWORD_HASHERS = list(dict.fromkeys([
+    os.getenv(
+        'PASSWORD_HASHER',
+        default='foodgram.hashers.PooledPBKDF2PasswordHasher'
+    ),
+    'foodgram.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]))
+PASSWORD_HASHING_ITERATIONS = int(
+    os.getenv('PASSWORD_HASHING_ITERATIONS', default=260000)
+)
+PASSWORD_HASHING_POOL = {
+    'WORKERS': int(os.getenv('PASSWORD_HASHING_WORKERS', default=2)),
+    'MAX_QUEUED': int(os.getenv('PASSWORD_HASHING_MAX_QUEUED', default=32)),
+    'TIMEOUT': 10,
+    'KIND': os.getenv('PASSWORD_HASHING_POOL_KIND', default='thread'),
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -111,8 +179,93 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitPageNumberPagination',
     'PAGE_SIZE': 6,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': os.getenv('THROTTLE_RATE_AUTH', default='20/min'),
+        'shopping_cart_pdf': os.getenv(
+            'THROTTLE_RATE_SHOPPING_CART_PDF', default='10/min'
+        ),
+        'recipe_write': os.getenv(
+            'THROTTLE_RATE_RECIPE_WRITE', default='30/hour'
+        ),
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+    'EXCEPTION_HANDLER': 'api.exceptions.exception_handler',
 }
 
+# Responses of at least this many bytes are compressed with brotli (when
+# installed) or gzip, whichever the client accepts.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Token buckets live in the default cache unless a SQLite file shared by
+# the workers is configured.
+THROTTLE_BUCKET_PATH = os.getenv('THROTTLE_BUCKET_PATH', default='')
+
 AUTH_USER_MODEL = 'users.User'
+
+# Background jobs: a failed job is retried after JOBS_RETRY_DELAY seconds,
+# doubling each time; a job running longer than JOBS_LEASE seconds is taken
+# as crashed and claimed again.
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', default=3))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', default=30))
+JOBS_LEASE = int(os.getenv('JOBS_LEASE', default=600))
+JOBS_DELETE_BATCH_SIZE = 500
+
+# Saves and deletes of these models write a change event in the same
+# transaction. Events all consumers handled are pruned after
+# OUTBOX_RETENTION_DAYS.
+OUTBOX_MODELS = [
+    'recipes.Recipe',
+    'recipes.Ingredient',
+    'recipes.Tag',
+    'recipes.Subscribe',
+    'recipes.FavoriteRecipe',
+    'recipes.ShoppingCart',
+]
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', default=7))
+
+# Recipes of authors with more followers are read from their table instead
+# of being copied into every follower's feed.
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.getenv('FEED_FANOUT_MAX_FOLLOWERS', default=10000)
+)
+FEED_BACKFILL_SIZE = 100
+
+# Anonymous reads of recipes, tags and ingredients may be kept by nginx
+# and other shared caches this many seconds, then served stale for up to
+# PUBLIC_CACHE_STALE more seconds while one request refreshes them. Zero
+# turns shared caching off.
+PUBLIC_CACHE_MAX_AGE = int(os.getenv('PUBLIC_CACHE_MAX_AGE', default=5))
+PUBLIC_CACHE_STALE = int(os.getenv('PUBLIC_CACHE_STALE', default=30))
+
+# Length of the similar recipes list stored per recipe, and how many of a
+# user's latest favorites and cart recipes seed their recommendations.
+RECIPE_NEIGHBORS = 50
+RECOMMENDATION_SEEDS = 50
+
+# Ingredients, tags and recipe rankings are served from this file, mapped
+# read-only by every worker, once build_catalog_snapshot has written it.
+# Workers look for a newer file every CATALOG_SNAPSHOT_CHECK_INTERVAL
+# seconds; an empty path reads the catalog from the database.
+CATALOG_SNAPSHOT_PATH = os.getenv(
+    'CATALOG_SNAPSHOT_PATH', default=str(BASE_DIR / 'catalog/catalog.bin')
+)
+CATALOG_SNAPSHOT_CHECK_INTERVAL = float(
+    os.getenv('CATALOG_SNAPSHOT_CHECK_INTERVAL', default=1)
+)
+
+# Seconds a worker may serve a stale tag catalog after another worker
+# changes tags; changes in the same worker are seen at once. The bit of a
+# deleted tag is not given to a new tag for as long.
+TAG_CATALOG_TIMEOUT = 60
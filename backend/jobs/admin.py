@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from foodgram.paginator import EstimatedCountPaginator
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'kind', 'user', 'status', 'attempts', 'created',
+                    'finished',)
+    list_select_related = ('user',)
+    list_filter = ('status', 'kind',)
+    raw_id_fields = ('user',)
+    search_fields = ('user__email',)
+    readonly_fields = ('result', 'error',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
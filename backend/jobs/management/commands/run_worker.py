@@ -0,0 +1,82 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from jobs.models import Job
+
+
+def start_process(number):
+    return os.getpid()
+
+
+def run_job(job_id):
+    try:
+        return Job.execute(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs in a pool of processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=os.cpu_count() or 1)
+        parser.add_argument('--poll-interval', type=float, default=1,
+                            help='seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true',
+                            help='exit once the queue is empty')
+
+    def handle(self, *args, processes, poll_interval, burst, **options):
+        while True:
+            # Fork the pool before this process opens any database
+            # connection, so children never share a socket or a pooled
+            # connection with it.
+            connections.close_all()
+            with ProcessPoolExecutor(processes) as pool:
+                list(pool.map(start_process, range(processes)))
+                self.stdout.write(f'Running jobs in {processes} processes')
+                try:
+                    self.run(pool, processes, poll_interval, burst)
+                except BrokenProcessPool:
+                    # Jobs of the dead pool are claimed again once their
+                    # lease runs out.
+                    self.stderr.write(self.style.ERROR(
+                        'A worker process died, starting a new pool'
+                    ))
+                else:
+                    return
+
+    def run(self, pool, processes, poll_interval, burst):
+        running = {}
+        while True:
+            free = processes - len(running)
+            for job_id in Job.objects.claim(free) if free else ():
+                running[pool.submit(run_job, job_id)] = job_id
+            if not running:
+                if burst:
+                    return
+                time.sleep(poll_interval)
+                continue
+            done, _ = wait(
+                running, timeout=poll_interval, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                self.report(running.pop(future), future)
+
+    def report(self, job_id, future):
+        """Write the outcome of a job; only a broken pool stops the loop."""
+        try:
+            status = future.result()
+        except BrokenProcessPool:
+            raise
+        except Exception as error:
+            self.stderr.write(self.style.ERROR(
+                f'Job {job_id} failed: {error!r}'
+            ))
+        else:
+            self.stdout.write(f'Job {job_id}: {status}')
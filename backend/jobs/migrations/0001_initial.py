@@ -0,0 +1,46 @@
+# Generated by Django 3.2.9 on 2026-10-19 10:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import jobs.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=64, verbose_name='Job kind')),
+                ('payload', models.JSONField(default=dict, verbose_name='Job payload')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16, verbose_name='Job status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=1, verbose_name='Max attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Run after')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Locked until')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Job result')),
+                ('result_file', models.FileField(blank=True, upload_to=jobs.models.result_path, verbose_name='Result file')),
+                ('error', models.TextField(blank=True, verbose_name='Last error')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Finished date')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'run_after'], name='job_due'),
+        ),
+    ]
@@ -0,0 +1,139 @@
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .registry import handlers
+
+User = get_user_model()
+
+
+def result_path(job, filename):
+    return f'jobs/{uuid.uuid4().hex}/{filename}'
+
+
+class JobManager(models.Manager):
+
+    def enqueue(self, kind, user=None, **payload):
+        return self.create(
+            kind=kind, user=user, payload=payload,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        )
+
+    def claim(self, limit):
+        """Mark up to ``limit`` due jobs as running and return their ids.
+
+        Jobs whose lease ran out are claimed again, so a crashed worker
+        does not leave them running forever. Each job is taken with a
+        conditional update, and only the worker that changed the row runs
+        it.
+        """
+        now = timezone.now()
+        due = Q(status=Job.QUEUED, run_after__lte=now) | Q(
+            status=Job.RUNNING, locked_until__lt=now
+        )
+        claimed = []
+        for pk in self.filter(due).order_by(
+            'run_after', 'id'
+        ).values_list('id', flat=True)[:limit]:
+            if self.filter(due, pk=pk).update(
+                status=Job.RUNNING,
+                attempts=F('attempts') + 1,
+                locked_until=now + timedelta(seconds=settings.JOBS_LEASE),
+            ):
+                claimed.append(pk)
+        return claimed
+
+
+class Job(models.Model):
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, _('Queued')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    )
+
+    kind = models.CharField(_('Job kind'), max_length=64)
+    payload = models.JSONField(_('Job payload'), default=dict)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='jobs',
+        verbose_name=_('User'),
+    )
+    status = models.CharField(
+        _('Job status'), max_length=16, choices=STATUSES, default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField(_('Attempts'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        _('Max attempts'), default=1,
+    )
+    run_after = models.DateTimeField(_('Run after'), default=timezone.now)
+    locked_until = models.DateTimeField(
+        _('Locked until'), null=True, blank=True,
+    )
+    result = models.JSONField(_('Job result'), null=True, blank=True)
+    result_file = models.FileField(
+        _('Result file'), upload_to=result_path, blank=True,
+    )
+    error = models.TextField(_('Last error'), blank=True)
+    created = models.DateTimeField(_('Created date'), auto_now_add=True)
+    finished = models.DateTimeField(_('Finished date'), null=True, blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_due'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.id}, {self.status}'
+
+    @classmethod
+    def execute(cls, job_id):
+        """Run a claimed job and record its outcome."""
+        job = cls.objects.get(pk=job_id)
+        if job.attempts > job.max_attempts:
+            job.finish(cls.FAILED, error='Lease expired on the last attempt')
+            return job.status
+        try:
+            result = handlers[job.kind](job)
+        except Exception:
+            job.retry_or_fail(traceback.format_exc())
+        else:
+            job.finish(cls.DONE, result=result)
+        return job.status
+
+    def finish(self, status, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.status = status
+        self.locked_until = None
+        self.finished = timezone.now()
+        self.save()
+
+    def retry_or_fail(self, error):
+        if self.attempts >= self.max_attempts:
+            self.finish(self.FAILED, error=error)
+            return
+        self.status = self.QUEUED
+        self.error = error
+        self.locked_until = None
+        self.run_after = timezone.now() + timedelta(
+            seconds=settings.JOBS_RETRY_DELAY * 2 ** (self.attempts - 1)
+        )
+        self.save()
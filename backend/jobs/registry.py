@@ -0,0 +1,14 @@
+handlers = {}
+
+
+def register(kind):
+    """Register a function that runs jobs of ``kind``.
+
+    The function gets the Job and returns a JSON-serializable result.
+    Modules named ``jobs`` in installed apps are imported on startup, so
+    handlers defined there are known to both the API and the worker.
+    """
+    def decorator(function):
+        handlers[kind] = function
+        return function
+    return decorator
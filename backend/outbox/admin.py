@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from foodgram.paginator import EstimatedCountPaginator
+
+from .models import ChangeEvent, Checkpoint
+
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'entity', 'action', 'object_id', 'created',)
+    list_filter = ('entity', 'action',)
+    readonly_fields = ('entity', 'action', 'object_id', 'data', 'created',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Checkpoint)
+class CheckpointAdmin(admin.ModelAdmin):
+
+    list_display = ('consumer', 'txid', 'position', 'updated',)
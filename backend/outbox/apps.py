@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import autodiscover_modules
+
+
+class OutboxConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'outbox'
+
+    def ready(self):
+        from .models import ChangeEvent
+
+        for label in settings.OUTBOX_MODELS:
+            post_save.connect(ChangeEvent.saved, sender=label,
+                              dispatch_uid=f'outbox-save-{label}')
+            post_delete.connect(ChangeEvent.deleted, sender=label,
+                                dispatch_uid=f'outbox-delete-{label}')
+        autodiscover_modules('consumers')
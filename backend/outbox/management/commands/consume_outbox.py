@@ -0,0 +1,62 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from outbox.models import Checkpoint
+from outbox.registry import consumers
+
+
+class Command(BaseCommand):
+    help = 'Feed change events to the registered consumers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumers', nargs='*',
+                            help='consumer names, all by default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--replay', action='store_true',
+                            help='reset the consumers and start over')
+        parser.add_argument('--follow', action='store_true',
+                            help='keep polling for new events')
+        parser.add_argument('--poll-interval', type=float, default=1)
+        parser.add_argument('--prune', action='store_true',
+                            help='delete old events every consumer handled')
+
+    def handle(self, *args, batch_size, replay, follow, poll_interval,
+               prune, **options):
+        selected = self.get_consumers(options['consumers'], replay)
+        while True:
+            handled = self.process_batch(selected, batch_size)
+            if prune:
+                self.prune()
+            if handled:
+                continue
+            if not follow:
+                return
+            time.sleep(poll_interval)
+
+    def get_consumers(self, names, replay):
+        names = names or sorted(consumers)
+        unknown = set(names) - consumers.keys()
+        if unknown:
+            raise CommandError(f'Unknown consumers: {sorted(unknown)}')
+        selected = [consumers[name]() for name in names]
+        for consumer in selected:
+            Checkpoint.objects.get_or_create(consumer=consumer.name)
+            if replay:
+                Checkpoint.replay(consumer)
+        return selected
+
+    def process_batch(self, selected, batch_size):
+        """Hand every consumer its next batch; return the events handled."""
+        handled = 0
+        for consumer in selected:
+            count = Checkpoint.consume(consumer, batch_size)
+            if count:
+                self.stdout.write(f'{consumer.name}: {count} events')
+            handled += count
+        return handled
+
+    def prune(self):
+        pruned = Checkpoint.prune()
+        if pruned:
+            self.stdout.write(f'Pruned {pruned} events')
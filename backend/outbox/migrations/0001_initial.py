@@ -0,0 +1,42 @@
+# Generated by Django 3.2.9 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=64, verbose_name='Model label')),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=8, verbose_name='Action')),
+                ('object_id', models.BigIntegerField(verbose_name='Object id')),
+                ('data', models.JSONField(default=dict, verbose_name='Related ids')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Event date')),
+            ],
+            options={
+                'verbose_name': 'Событие изменения',
+                'verbose_name_plural': 'События изменений',
+            },
+        ),
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=64, unique=True, verbose_name='Consumer')),
+                ('position', models.BigIntegerField(default=0, verbose_name='Last handled event')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Checkpoint date')),
+            ],
+            options={
+                'verbose_name': 'Позиция обработчика',
+                'verbose_name_plural': 'Позиции обработчиков',
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.9 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+def create_txid_trigger(apps, schema_editor):
+    # Consumers order events by the transaction that wrote them, so every
+    # insert, including bulk_create and COPY, takes the id of its own.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('''
+        CREATE FUNCTION outbox_changeevent_txid() RETURNS trigger AS $$
+        BEGIN
+            NEW.txid := txid_current();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    ''')
+    schema_editor.execute('''
+        CREATE TRIGGER outbox_changeevent_txid
+        BEFORE INSERT ON outbox_changeevent
+        FOR EACH ROW EXECUTE PROCEDURE outbox_changeevent_txid()
+    ''')
+
+
+def drop_txid_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'DROP TRIGGER IF EXISTS outbox_changeevent_txid ON outbox_changeevent'
+    )
+    schema_editor.execute('DROP FUNCTION IF EXISTS outbox_changeevent_txid()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeevent',
+            name='txid',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Transaction id'),
+        ),
+        migrations.AddField(
+            model_name='checkpoint',
+            name='txid',
+            field=models.BigIntegerField(default=0, verbose_name='Transaction of the last handled event'),
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['txid', 'id'], name='change_event_order'),
+        ),
+        migrations.RunPython(create_txid_trigger, drop_txid_trigger),
+    ]
@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class ChangeEventManager(models.Manager):
+
+    def record(self, action, objects):
+        """Write an event per object in the current transaction.
+
+        Bulk inserts, ``update()`` and raw SQL send no signals, so code
+        that changes tracked rows that way records the events itself.
+        """
+        return self.bulk_create(
+            (self.model.describe(obj, action) for obj in objects),
+            batch_size=1000,
+        )
+
+
+class ChangeEvent(models.Model):
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS = (
+        (CREATED, _('Created')),
+        (UPDATED, _('Updated')),
+        (DELETED, _('Deleted')),
+    )
+
+    entity = models.CharField(_('Model label'), max_length=64)
+    action = models.CharField(_('Action'), max_length=8, choices=ACTIONS)
+    object_id = models.BigIntegerField(_('Object id'))
+    data = models.JSONField(_('Related ids'), default=dict)
+    created = models.DateTimeField(_('Event date'), auto_now_add=True)
+    # Set by a trigger on PostgreSQL, see the 0002 migration.
+    txid = models.BigIntegerField(
+        _('Transaction id'), default=0, editable=False
+    )
+
+    objects = ChangeEventManager()
+
+    class Meta:
+        verbose_name = 'Событие изменения'
+        verbose_name_plural = 'События изменений'
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='change_event_order'),
+        ]
+
+    def __str__(self):
+        return f'#{self.id} {self.entity} {self.object_id} {self.action}'
+
+    @classmethod
+    def describe(cls, obj, action):
+        """Event for ``obj`` carrying the ids of the rows it points to."""
+        return cls(
+            entity=obj._meta.label_lower,
+            action=action,
+            object_id=obj.pk,
+            data={
+                field.attname: getattr(obj, field.attname)
+                for field in obj._meta.concrete_fields
+                if field.is_relation
+            },
+        )
+
+    @staticmethod
+    def saved(sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        action = ChangeEvent.CREATED if created else ChangeEvent.UPDATED
+        ChangeEvent.describe(instance, action).save()
+
+    @staticmethod
+    def deleted(sender, instance, **kwargs):
+        ChangeEvent.describe(instance, ChangeEvent.DELETED).save()
+
+
+class Checkpoint(models.Model):
+
+    consumer = models.CharField(_('Consumer'), max_length=64, unique=True)
+    position = models.BigIntegerField(_('Last handled event'), default=0)
+    txid = models.BigIntegerField(
+        _('Transaction of the last handled event'), default=0
+    )
+    updated = models.DateTimeField(_('Checkpoint date'), auto_now=True)
+
+    class Meta:
+        verbose_name = 'Позиция обработчика'
+        verbose_name_plural = 'Позиции обработчиков'
+
+    def __str__(self):
+        return f'{self.consumer}, {self.position}'
+
+    @classmethod
+    def consume(cls, consumer, batch_size=1000):
+        """Hand the next batch of events to ``consumer``.
+
+        Events and the new position are read and saved in one transaction,
+        so a consumer that keeps its state in the database sees every
+        event exactly once. Ids are taken before commit, so a transaction
+        may commit a smaller id after a larger one was read. On PostgreSQL
+        events are therefore handed out by transaction id, and only those
+        of transactions older than every running one, which can no longer
+        be joined by new events. SQLite commits one transaction at a time.
+        """
+        with transaction.atomic():
+            checkpoint, _ = cls.objects.select_for_update().get_or_create(
+                consumer=consumer.name
+            )
+            events = ChangeEvent.objects.filter(
+                checkpoint.after()
+            ).order_by('txid', 'id')
+            if connection.vendor == 'postgresql':
+                events = events.filter(txid__lt=RawSQL(
+                    'txid_snapshot_xmin(txid_current_snapshot())', ()
+                ))
+            if consumer.entities is not None:
+                events = events.filter(entity__in=consumer.entities)
+            events = list(events[:batch_size])
+            if events:
+                consumer.handle(events)
+                checkpoint.txid = events[-1].txid
+                checkpoint.position = events[-1].id
+                checkpoint.save()
+        return len(events)
+
+    def after(self):
+        """Condition matching the events after this position."""
+        return Q(txid=self.txid, id__gt=self.position) | Q(
+            txid__gt=self.txid
+        )
+
+    @classmethod
+    def replay(cls, consumer):
+        with transaction.atomic():
+            consumer.reset()
+            cls.objects.update_or_create(
+                consumer=consumer.name, defaults={'position': 0, 'txid': 0}
+            )
+
+    @classmethod
+    def prune(cls):
+        """Delete events every consumer has handled and that are old.
+
+        Events newer than OUTBOX_RETENTION_DAYS stay for replays.
+        """
+        slowest = cls.objects.order_by('txid', 'position').first()
+        if slowest is None:
+            return 0
+        deleted, _ = ChangeEvent.objects.exclude(slowest.after()).filter(
+            created__lt=timezone.now() - timedelta(
+                days=settings.OUTBOX_RETENTION_DAYS
+            ),
+        ).delete()
+        return deleted
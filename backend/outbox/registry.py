@@ -0,0 +1,30 @@
+consumers = {}
+
+
+class Consumer:
+    """Structure derived from the change events, updated incrementally.
+
+    Subclasses set ``name``, optionally limit ``entities`` to the model
+    labels they need (``'recipes.recipe'``), and implement ``handle``.
+    ``reset`` drops what was derived before a replay from the first
+    event still kept.
+    """
+
+    name = None
+    entities = None
+
+    def handle(self, events):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+def register(consumer_class):
+    """Register a consumer of the outbox.
+
+    Modules named ``consumers`` in installed apps are imported on startup,
+    so consumers defined there are known to ``consume_outbox``.
+    """
+    consumers[consumer_class.name] = consumer_class
+    return consumer_class
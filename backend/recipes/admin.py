@@ -1,18 +1,47 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 
-from .models import (FavoriteRecipe, Ingredient, Recipe, RecipeIngredient,
-                     RecipeTag, ShoppingCart, Subscribe, Tag)
+from foodgram.paginator import EstimatedCountPaginator
+
+from .models import (FavoriteRecipe, FeedEntry, Ingredient, Recipe,
+                     RecipeIngredient, RecipeTag, ShoppingCart,
+                     ShoppingListItem, Subscribe, Tag)
 
 
 class RecipeTagAdmin(admin.StackedInline):
     model = RecipeTag
     autocomplete_fields = ('tag',)
+    extra = 1
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('tag')
 
 
 class RecipeIngredientAdmin(admin.StackedInline):
     model = RecipeIngredient
     autocomplete_fields = ('ingredient',)
+    extra = 1
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ingredient')
+
+
+class RecipeTagFilter(admin.SimpleListFilter):
+    title = 'tags'
+    parameter_name = 'tag'
+
+    def lookups(self, request, model_admin):
+        return Tag.objects.values_list('slug', 'name')
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'), tag__slug=self.value()
+        )))
 
 
 @admin.register(Recipe)
@@ -21,13 +50,45 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ('id', 'get_author', 'name', 'text', 'cooking_time',
                     'get_image', 'get_tags', 'get_ingredients', 'pub_date',
                     'get_favorite_count')
+    list_select_related = ('author',)
     search_fields = ('name', 'cooking_time', 'author__email',
                      'ingredients__name')
-    list_filter = ('pub_date', 'tags',)
+    list_filter = ('pub_date', RecipeTagFilter,)
     inlines = (RecipeTagAdmin, RecipeIngredientAdmin,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
     save_on_top = True
 
+    def get_queryset(self, request):
+        favorite_count = FavoriteRecipe.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            count=Count('id')
+        ).values('count')
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only('name')),
+            Prefetch(
+                'recipe',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        ).annotate(favorite_count=Coalesce(Subquery(favorite_count), 0))
+
+    def get_search_results(self, request, queryset, search_term):
+        for term in search_term.split():
+            ingredients = RecipeIngredient.objects.filter(
+                recipe=OuterRef('pk'), ingredient__name__icontains=term
+            )
+            condition = Exists(ingredients) | Q(name__icontains=term) | Q(
+                author__email__icontains=term
+            )
+            if term.isdigit():
+                condition |= Q(cooking_time=term)
+            queryset = queryset.filter(condition)
+        return queryset, False
+
     @admin.display(description='author email')
     def get_author(self, obj):
         return obj.author.email
@@ -52,15 +113,30 @@ class RecipeAdmin(admin.ModelAdmin):
             ]
         )
 
-    @admin.display(description='favorite count')
+    @admin.display(description='favorite count',
+                   ordering='favorite_count')
     def get_favorite_count(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorite_count
+
+    def save_related(self, request, form, formsets, change):
+        with ShoppingListItem.tracking(form.instance):
+            super().save_related(request, form, formsets, change)
+        Recipe.update_tag_masks([form.instance.pk])
+
+    def delete_model(self, request, obj):
+        with ShoppingListItem.tracking(obj):
+            super().delete_model(request, obj)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
 
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
 
-    list_display = ('id', 'name', 'color', 'slug', 'colored_box',)
+    list_display = ('id', 'name', 'color', 'slug', 'bit', 'colored_box',)
     search_fields = ('name', 'slug')
     empty_value_display = '-пусто-'
 
@@ -82,35 +158,72 @@ class IngredientAdmin(admin.ModelAdmin):
 class SubscribeAdmin(admin.ModelAdmin):
 
     list_display = ('id', 'follower', 'following', 'created',)
+    list_select_related = ('follower', 'following',)
+    raw_id_fields = ('follower', 'following',)
     search_fields = ('follower__email', 'following__email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
-@admin.register(FavoriteRecipe)
-class FavoriteRecipeAdmin(admin.ModelAdmin):
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
 
-    list_display = ('id', 'user', 'get_recipe', 'get_count')
+    list_display = ('id', 'user', 'recipe', 'author', 'pub_date',)
+    list_select_related = ('user', 'recipe__author', 'author',)
+    raw_id_fields = ('user', 'recipe', 'author',)
+    search_fields = ('user__email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
-    @admin.display(description='recipes')
-    def get_recipe(self, obj):
-        return [item.name for item in obj.recipe.all()]
 
-    @admin.display(description='count')
-    def get_count(self, obj):
-        return obj.recipe.count()
+@admin.register(FavoriteRecipe)
+class FavoriteRecipeAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'user', 'recipe', 'created',)
+    list_select_related = ('user', 'recipe__author',)
+    raw_id_fields = ('user', 'recipe',)
+    search_fields = ('user__email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
 
 
 @admin.register(ShoppingCart)
 class SoppingCartAdmin(admin.ModelAdmin):
 
-    list_display = ('id', 'user', 'get_recipe', 'get_count')
+    list_display = ('id', 'user', 'recipe', 'created',)
+    list_select_related = ('user', 'recipe__author',)
+    raw_id_fields = ('user', 'recipe',)
+    search_fields = ('user__email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
-    @admin.display(description='recipes')
-    def get_recipe(self, obj):
-        return [item.name for item in obj.recipe.all()]
+    def save_model(self, request, obj, form, change):
+        user_ids = {obj.user_id, form.initial.get('user', obj.user_id)}
+        super().save_model(request, obj, form, change)
+        ShoppingListItem.rebuild(user_ids)
 
-    @admin.display(description='count')
-    def get_count(self, obj):
-        return obj.recipe.count()
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        ShoppingListItem.rebuild([obj.user_id])
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        ShoppingListItem.rebuild(user_ids)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'user', 'ingredient', 'amount',)
+    list_select_related = ('user', 'ingredient',)
+    raw_id_fields = ('user', 'ingredient',)
+    search_fields = ('user__email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
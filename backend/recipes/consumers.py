@@ -0,0 +1,17 @@
+from django.conf import settings
+
+from outbox.registry import Consumer, register
+
+from .snapshot import build_snapshot
+
+
+@register
+class CatalogSnapshotConsumer(Consumer):
+    """Rebuild the shared catalog snapshot once per batch of changes."""
+
+    name = 'catalog_snapshot'
+    entities = ('recipes.ingredient', 'recipes.tag')
+
+    def handle(self, events):
+        if settings.CATALOG_SNAPSHOT_PATH:
+            build_snapshot()
@@ -0,0 +1,113 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.models import FeedEntry, Recipe, Subscribe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare fan-out on write and fan-out on read for the feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=20,
+                            help='recipes per author')
+        parser.add_argument('--followers', type=int, default=5000,
+                            help='followers of the author who publishes')
+        parser.add_argument('--page', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def run(self, authors, recipes, followers, page, repeat, **options):
+        reader = self.create_users('reader', 1)[0]
+        authors = self.create_users('author', authors)
+        Subscribe.objects.bulk_create(
+            Subscribe(follower=reader, following=author) for author in authors
+        )
+        Recipe.objects.bulk_create(
+            (
+                Recipe(author=author, name='bench', image='recipe/bench.png',
+                       text='bench', cooking_time=1)
+                for author in authors for _ in range(recipes)
+            ),
+            batch_size=1000,
+        )
+        self.stdout.write(
+            f'reader follows {len(authors)} authors, '
+            f'{len(authors) * recipes} recipes'
+        )
+
+        pull = Recipe.objects.filter(author__following__follower=reader)
+        self.report('fan-out on read', self.measure(
+            lambda: FeedEntry.page(reader, page), repeat
+        ))
+
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(user=reader, recipe_id=recipe_id,
+                          author_id=author_id, pub_date=pub_date)
+                for recipe_id, author_id, pub_date in pull.values_list(
+                    'id', 'author_id', 'pub_date'
+                ).iterator()
+            ),
+            batch_size=1000,
+        )
+        pull.update(feed_pushed=True)
+        self.report('fan-out on write', self.measure(
+            lambda: FeedEntry.page(reader, page), repeat
+        ))
+
+        publisher = authors[0]
+        Subscribe.objects.bulk_create(
+            Subscribe(follower=follower, following=publisher)
+            for follower in self.create_users('follower', followers)
+        )
+        started = time.perf_counter()
+        recipe = Recipe.objects.create(
+            author=publisher, name='bench', image='recipe/bench.png',
+            text='bench', cooking_time=1
+        )
+        elapsed = time.perf_counter() - started
+        strategy = 'pushed' if recipe.feed_pushed else 'left for read'
+        self.stdout.write(
+            f'publish to {followers + 1} followers ({strategy}): '
+            f'{elapsed * 1000:.3f} ms'
+        )
+
+    @staticmethod
+    def create_users(prefix, count):
+        User.objects.bulk_create(
+            (
+                User(username=f'bench_{prefix}_{number}',
+                     email=f'bench_{prefix}_{number}@example.com')
+                for number in range(count)
+            ),
+            batch_size=1000,
+        )
+        return list(
+            User.objects.filter(username__startswith=f'bench_{prefix}_')
+        )
+
+    @staticmethod
+    def measure(query, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def report(self, name, timings):
+        self.stdout.write(
+            f'{name:>17}: mean {statistics.mean(timings) * 1000:.3f} ms, '
+            f'min {min(timings) * 1000:.3f} ms'
+        )
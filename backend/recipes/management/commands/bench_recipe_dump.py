@@ -0,0 +1,101 @@
+import os
+import resource
+import tempfile
+import time
+from itertools import cycle, islice
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, call_command
+from django.db import transaction
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure export_recipes and import_recipes on synthetic recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000000)
+        parser.add_argument('--ingredients', type=int, default=5,
+                            help='ingredients per recipe')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            with transaction.atomic():
+                self.run(os.path.join(directory, 'recipes.jsonl'), **options)
+                transaction.set_rollback(True)
+
+    def run(self, path, recipes, ingredients, chunk_size, batch_size,
+            **options):
+        email = 'bench_dump_author@example.com'
+        author = User.objects.create(username='bench_dump_author',
+                                     email=email)
+        ingredient_ids = list(Ingredient.objects.values_list(
+            'id', flat=True
+        )[:100]) or [Ingredient.objects.create(
+            name='bench', measurement_unit='g'
+        ).id]
+        tag_ids = list(Tag.objects.values_list('id', flat=True)[:3])
+        self.create_recipes(author, recipes, ingredients, ingredient_ids,
+                            tag_ids)
+
+        started = time.perf_counter()
+        call_command('export_recipes', output=path, chunk_size=chunk_size,
+                     stderr=open(os.devnull, 'w'))
+        self.report('export', recipes, time.perf_counter() - started,
+                    os.path.getsize(path))
+
+        User.objects.filter(pk=author.pk).update(
+            email='bench_dump_exported@example.com'
+        )
+        User.objects.create(username='bench_dump_importer', email=email)
+        started = time.perf_counter()
+        call_command('import_recipes', path, batch_size=batch_size,
+                     restart=True, stdout=open(os.devnull, 'w'))
+        self.report('import', recipes, time.perf_counter() - started)
+
+    @staticmethod
+    def create_recipes(author, count, per_recipe, ingredient_ids, tag_ids):
+        Recipe.objects.bulk_create(
+            (
+                Recipe(author=author, name=f'bench {number}',
+                       image='recipe/bench.png', text='bench',
+                       cooking_time=1)
+                for number in range(count)
+            ),
+            batch_size=5000,
+        )
+        recipe_ids = Recipe.objects.filter(author=author).values_list(
+            'id', flat=True
+        )
+        ingredients = cycle(ingredient_ids)
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(recipe_id=recipe_id, ingredient_id=pk,
+                                 amount=1)
+                for recipe_id in recipe_ids.iterator()
+                for pk in dict.fromkeys(islice(ingredients, per_recipe))
+            ),
+            batch_size=5000,
+        )
+        RecipeTag.objects.bulk_create(
+            (
+                RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids.iterator() for tag_id in tag_ids
+            ),
+            batch_size=5000,
+        )
+
+    def report(self, name, count, elapsed, size=None):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        line = (
+            f'{name:>6}: {count} recipes in {elapsed:.1f}s, '
+            f'{count / elapsed:.0f} recipes/s, peak RSS {peak} MiB'
+        )
+        if size is not None:
+            line += f', {size / 2 ** 20:.1f} MiB written'
+        self.stdout.write(line)
@@ -0,0 +1,80 @@
+import resource
+import time
+
+import numpy as np
+from django.core.management import BaseCommand
+
+from recipes.neighbors import behavior_matrix, ingredient_matrix, neighbors
+
+
+def zipf_choice(rng, items, size, exponent):
+    """Draw ``size`` items where the n-th is 1/n^exponent as likely."""
+    weights = 1 / np.arange(1, items + 1) ** exponent
+    return rng.choice(items, size=size, p=weights / weights.sum())
+
+
+class Command(BaseCommand):
+    help = 'Build time of recipe neighbors on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000000)
+        parser.add_argument('--favorites', type=int, default=10000000)
+        parser.add_argument('--users', type=int, default=1000000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--per-recipe', type=int, default=8,
+                            help='ingredients per recipe')
+        parser.add_argument('--k', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--sample-batches', type=int, default=0,
+                            help='time this many batches and extrapolate, '
+                                 '0 runs them all')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, recipes, favorites, users, ingredients,
+               per_recipe, k, batch_size, sample_batches, seed, **options):
+        rng = np.random.default_rng(seed)
+        started = time.monotonic()
+        favorite_users = zipf_choice(rng, users, favorites, 0.8)
+        favorite_recipes = zipf_choice(rng, recipes, favorites, 0.9)
+        content_recipes = np.repeat(np.arange(recipes), per_recipe)
+        content_ingredients = zipf_choice(
+            rng, ingredients, len(content_recipes), 1.0
+        )
+        generated = time.monotonic()
+
+        behavior = behavior_matrix(
+            favorite_users, favorite_recipes, np.ones(favorites), recipes
+        )
+        contents = ingredient_matrix(
+            content_recipes, content_ingredients, recipes, 0.05
+        )
+        built = time.monotonic()
+
+        batches = -(-recipes // batch_size)
+        timed = min(sample_batches or batches, batches)
+        pairs = 0
+        for number, (rows, _, _) in enumerate(
+            neighbors(behavior, contents, k, 0.7, batch_size)
+        ):
+            pairs += len(rows)
+            if number + 1 == timed:
+                break
+        finished = time.monotonic()
+        total = (finished - built) * batches / timed
+        stored = pairs * batches / timed * (8 + 4)
+
+        self.stdout.write(
+            f'{recipes} recipes, {favorites} favorites of {users} users, '
+            f'{len(content_recipes)} recipe ingredients '
+            f'(generated in {generated - started:.1f}s)'
+        )
+        self.stdout.write(
+            f'matrices {built - generated:.1f}s, neighbors '
+            f'{finished - built:.1f}s for {timed} of {batches} batches, '
+            f'about {total:.0f}s for all'
+        )
+        self.stdout.write(
+            f'about {stored / 2 ** 20:.0f} MB of neighbor lists, peak RSS '
+            f'{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}'
+            f' MB'
+        )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from recipes.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write the catalog snapshot that workers map into memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.CATALOG_SNAPSHOT_PATH)
+
+    def handle(self, *args, path, **options):
+        if not path:
+            raise CommandError(
+                'CATALOG_SNAPSHOT_PATH is empty, pass --path'
+            )
+        size = build_snapshot(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {size} bytes to {path}'
+        ))
@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import (FavoriteRecipe, Recipe, RecipeIngredient,
+                            RecipeNeighbors, ShoppingCart)
+from recipes.neighbors import (behavior_matrix, export_pairs,
+                               ingredient_matrix, neighbors, positions)
+
+
+class Command(BaseCommand):
+    help = 'Compute the most similar recipes of every recipe'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int,
+                            default=settings.RECIPE_NEIGHBORS,
+                            help='neighbors kept per recipe')
+        parser.add_argument('--alpha', type=float, default=0.7,
+                            help='weight of favorites and carts against '
+                                 'ingredient overlap')
+        parser.add_argument('--cart-weight', type=float, default=0.5)
+        parser.add_argument('--max-ingredient-share', type=float,
+                            default=0.05,
+                            help='ignore ingredients of more recipes')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='recipes per slice of the product')
+        parser.add_argument('--write-batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        recipe_ids = np.sort(export_pairs(Recipe.objects.all(), 'id')[:, 0])
+        if not len(recipe_ids):
+            raise CommandError('No recipes')
+        favorites = export_pairs(
+            FavoriteRecipe.objects.all(), 'user_id', 'recipe_id'
+        )
+        carts = export_pairs(
+            ShoppingCart.objects.all(), 'user_id', 'recipe_id'
+        )
+        contents = export_pairs(
+            RecipeIngredient.objects.all(), 'recipe_id', 'ingredient_id'
+        )
+        exported = time.monotonic()
+
+        pairs = np.concatenate([favorites, carts])
+        weights = np.concatenate([
+            np.ones(len(favorites)),
+            np.full(len(carts), options['cart_weight']),
+        ])
+        recipes = positions(recipe_ids, pairs[:, 1])
+        known = recipes >= 0
+        behavior = behavior_matrix(
+            pairs[known, 0], recipes[known], weights[known], len(recipe_ids)
+        )
+        recipes = positions(recipe_ids, contents[:, 0])
+        known = recipes >= 0
+        ingredients = ingredient_matrix(
+            recipes[known], contents[known, 1], len(recipe_ids),
+            options['max_ingredient_share'],
+        )
+        built = time.monotonic()
+
+        written = 0
+        with transaction.atomic():
+            RecipeNeighbors.objects.all().delete()
+            for rows, cols, scores in neighbors(
+                behavior, ingredients, options['k'], options['alpha'],
+                options['batch_size'],
+            ):
+                written += self.write(
+                    recipe_ids, rows, recipe_ids[cols], scores,
+                    options['write_batch_size'],
+                )
+        finished = time.monotonic()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored neighbors of {written} recipes from {len(favorites)} '
+            f'favorites, {len(carts)} cart entries and {len(contents)} '
+            f'ingredients: export {exported - started:.1f}s, matrices '
+            f'{built - exported:.1f}s, neighbors {finished - built:.1f}s'
+        ))
+
+    @staticmethod
+    def write(recipe_ids, rows, neighbor_ids, scores, batch_size):
+        """Store one list per row; ``rows`` are sorted, best first."""
+        if not len(rows):
+            return 0
+        starts = [0, *(rows[1:] != rows[:-1]).nonzero()[0] + 1, len(rows)]
+        objects = [
+            RecipeNeighbors(
+                recipe_id=int(recipe_ids[rows[start]]),
+                recipe_ids=neighbor_ids[start:stop].astype('<i8').tobytes(),
+                scores=scores[start:stop].astype('<f4').tobytes(),
+            )
+            for start, stop in zip(starts, starts[1:])
+        ]
+        RecipeNeighbors.objects.bulk_create(objects, batch_size=batch_size)
+        return len(objects)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from recipes.models import (FavoriteRecipe, Recipe, RecipeActivity,
+                            RecipeScore, ShoppingCart)
+from recipes.snapshot import build_snapshot
+
+COUNTERS = (
+    'favorites_day', 'favorites_week', 'favorites_total',
+    'carts_day', 'carts_week', 'carts_total',
+)
+
+# SQLite needs the WHERE to tell ON CONFLICT from a join constraint.
+UPSERT_SQL = '''
+    INSERT INTO {table} (recipe_id, {counters}, popular, trending, updated)
+    SELECT id, {counters},
+        favorites_total + carts_total,
+        4 * (favorites_day + carts_day) + favorites_week + carts_week,
+        %s
+    FROM ({counts}) AS counts
+    WHERE true
+    ON CONFLICT (recipe_id) DO UPDATE SET {updates}
+'''
+
+
+def count(queryset):
+    """Correlated count of the ``queryset`` rows of the outer recipe."""
+    return Coalesce(Subquery(
+        queryset.filter(recipe=OuterRef('pk')).order_by().values(
+            'recipe'
+        ).annotate(count=Count('id')).values('count')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recompute popular and trending recipe scores'
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        day, week = now - timedelta(days=1), now - timedelta(days=7)
+        favorites = RecipeActivity.objects.filter(
+            kind=RecipeActivity.FAVORITE
+        )
+        carts = RecipeActivity.objects.filter(
+            kind=RecipeActivity.SHOPPING_CART
+        )
+        counts = Recipe.objects.annotate(
+            favorites_day=count(favorites.filter(created__gte=day)),
+            favorites_week=count(favorites.filter(created__gte=week)),
+            favorites_total=count(FavoriteRecipe.objects.all()),
+            carts_day=count(carts.filter(created__gte=day)),
+            carts_week=count(carts.filter(created__gte=week)),
+            carts_total=count(ShoppingCart.objects.all()),
+        ).values('id', *COUNTERS).order_by()
+        counts_sql, params = counts.query.sql_with_params()
+        sql = UPSERT_SQL.format(
+            table=RecipeScore._meta.db_table,
+            counters=', '.join(COUNTERS),
+            counts=counts_sql,
+            updates=', '.join(
+                f'{column} = excluded.{column}'
+                for column in (*COUNTERS, 'popular', 'trending', 'updated')
+            ),
+        )
+
+        with transaction.atomic():
+            RecipeScore.objects.exclude(
+                recipe__in=Recipe.objects.all()
+            ).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, (
+                    connection.ops.adapt_datetimefield_value(now), *params,
+                ))
+                scored = cursor.rowcount
+            pruned, _ = RecipeActivity.objects.filter(
+                created__lt=week
+            ).delete()
+        if settings.CATALOG_SNAPSHOT_PATH:
+            build_snapshot()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {scored} recipes, pruned {pruned} old events'
+        ))
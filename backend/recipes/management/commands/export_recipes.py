@@ -0,0 +1,101 @@
+import json
+import sys
+import tarfile
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+
+from recipes.models import Recipe, RecipeIngredient, RecipeTag
+
+
+class Command(BaseCommand):
+    help = 'Stream recipes with their ingredients and tags as JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help='jsonl file, "-" for stdout')
+        parser.add_argument('--images', help='bundle images into this tar')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        output = (
+            sys.stdout if options['output'] == '-'
+            else open(options['output'], 'w', encoding='utf-8')
+        )
+        images = options['images'] and tarfile.open(options['images'], 'w')
+        chunk_size = options['chunk_size']
+        exported = missing_images = 0
+        self.bundled = set()
+        started = time.monotonic()
+
+        recipes = Recipe.objects.order_by('id').values(
+            'id', 'author__email', 'name', 'text', 'cooking_time',
+            'pub_date', 'image',
+        ).iterator(chunk_size=chunk_size)
+        try:
+            while True:
+                chunk = list(islice(recipes, chunk_size))
+                if not chunk:
+                    break
+                for record in self.serialize(chunk):
+                    output.write(json.dumps(record, ensure_ascii=False))
+                    output.write('\n')
+                    if images and not self.add_image(images, record['image']):
+                        missing_images += 1
+                exported += len(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+            if images:
+                images.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {exported} recipes in '
+            f'{time.monotonic() - started:.2f}s'
+            + (f', {missing_images} images missing' if missing_images else '')
+        ))
+
+    def serialize(self, chunk):
+        recipe_ids = [recipe['id'] for recipe in chunk]
+        ingredients = defaultdict(list)
+        for recipe_id, name, unit, amount in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list(
+            'recipe_id', 'ingredient__name', 'ingredient__measurement_unit',
+            'amount',
+        ).order_by('id'):
+            ingredients[recipe_id].append(
+                {'name': name, 'measurement_unit': unit, 'amount': amount}
+            )
+        tags = defaultdict(list)
+        for recipe_id, slug in RecipeTag.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'tag__slug').order_by('id'):
+            tags[recipe_id].append(slug)
+
+        for recipe in chunk:
+            yield {
+                'author': recipe['author__email'],
+                'name': recipe['name'],
+                'text': recipe['text'],
+                'cooking_time': recipe['cooking_time'],
+                'pub_date': recipe['pub_date'].isoformat(),
+                'image': recipe['image'],
+                'tags': tags[recipe['id']],
+                'ingredients': ingredients[recipe['id']],
+            }
+
+    def add_image(self, images, name):
+        if name in self.bundled:
+            return True
+        if not name or not default_storage.exists(name):
+            return False
+        self.bundled.add(name)
+        info = tarfile.TarInfo(name)
+        info.size = default_storage.size(name)
+        with default_storage.open(name) as file:
+            images.addfile(info, file)
+        return True
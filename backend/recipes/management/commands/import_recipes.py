@@ -0,0 +1,200 @@
+import json
+import os
+import posixpath
+import tarfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from outbox.models import ChangeEvent
+from recipes.models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Import recipes written by export_recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument('--images', help='tar with recipe images')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--progress-file', type=Path,
+                            help='defaults to <path>.progress')
+        parser.add_argument('--restart', action='store_true',
+                            help='ignore saved progress')
+
+    def handle(self, *args, **options):
+        progress_file = options['progress_file'] or Path(
+            f'{options["path"]}.progress'
+        )
+        offset = 0
+        if progress_file.exists() and not options['restart']:
+            offset = int(progress_file.read_text())
+            self.stdout.write(f'Resuming from byte {offset}')
+        if options['images']:
+            self.extract_images(options['images'])
+
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.tag_bits = dict(Tag.objects.values_list('slug', 'bit'))
+        self.ingredients = {}
+        self.counts = dict.fromkeys(('imported', 'existing', 'skipped'), 0)
+        started = time.monotonic()
+        with open(options['path'], 'rb') as file:
+            file.seek(offset)
+            batch = []
+            for line in file:
+                offset += len(line)
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= options['batch_size']:
+                    self.import_batch(batch)
+                    self.save_progress(progress_file, offset, started)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        if progress_file.exists():
+            progress_file.unlink()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.counts["imported"]} recipes in '
+            f'{time.monotonic() - started:.2f}s, '
+            f'{self.counts["existing"]} already present, '
+            f'{self.counts["skipped"]} skipped (unknown author)'
+        ))
+
+    def save_progress(self, progress_file, offset, started):
+        temporary = progress_file.with_name(f'{progress_file.name}.tmp')
+        temporary.write_text(str(offset))
+        os.replace(temporary, progress_file)
+        imported = self.counts['imported']
+        self.stdout.write(
+            f'{imported} recipes, '
+            f'{imported / (time.monotonic() - started):.0f} recipes/s'
+        )
+
+    def extract_images(self, path):
+        with tarfile.open(path, 'r|*') as images:
+            for member in images:
+                name = posixpath.normpath(member.name)
+                if (
+                    not member.isfile() or name.startswith(('/', '..'))
+                    or default_storage.exists(name)
+                ):
+                    continue
+                default_storage.save(name, images.extractfile(member))
+
+    @transaction.atomic
+    def import_batch(self, records):
+        authors = dict(User.objects.filter(
+            email__in={record['author'] for record in records}
+        ).values_list('email', 'id'))
+        ingredients = self.get_ingredients(records)
+
+        recipes, rows = [], []
+        for record in records:
+            author_id = authors.get(record['author'])
+            if author_id is None:
+                self.counts['skipped'] += 1
+                continue
+            recipe = Recipe(
+                author_id=author_id, name=record['name'],
+                text=record['text'], cooking_time=record['cooking_time'],
+                pub_date=parse_datetime(record['pub_date']),
+                image=record['image'],
+                tag_mask=sum({
+                    1 << self.tag_bits[slug] for slug in record['tags']
+                    if slug in self.tag_bits
+                }),
+            )
+            recipes.append(recipe)
+            rows.append(record)
+        recipes, rows = self.exclude_existing(recipes, rows)
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            # bulk_create stamps pub_date (auto_now_add) with the current
+            # time, so the exported dates are written back in one update.
+            pub_dates = [recipe.pub_date for recipe in recipes]
+            Recipe.objects.bulk_create(recipes)
+            for recipe, pub_date in zip(recipes, pub_dates):
+                recipe.pub_date = pub_date
+            Recipe.objects.bulk_update(recipes, ['pub_date'])
+        else:
+            for recipe in recipes:
+                recipe.save_base(raw=True)
+
+        recipe_ingredients, recipe_tags = [], []
+        for recipe, record in zip(recipes, rows):
+            amounts = defaultdict(int)
+            for item in record['ingredients']:
+                key = (item['name'], item['measurement_unit'])
+                amounts[ingredients[key]] += item['amount']
+            recipe_ingredients.extend(
+                RecipeIngredient(recipe=recipe, ingredient_id=ingredient_id,
+                                 amount=amount)
+                for ingredient_id, amount in amounts.items()
+            )
+            recipe_tags.extend(
+                RecipeTag(recipe=recipe, tag_id=self.tags[slug])
+                for slug in dict.fromkeys(record['tags'])
+                if slug in self.tags
+            )
+        RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        RecipeTag.objects.bulk_create(recipe_tags)
+        ChangeEvent.objects.record(ChangeEvent.CREATED, recipes)
+        self.counts['imported'] += len(recipes)
+
+    def get_ingredients(self, records):
+        keys = {
+            (item['name'], item['measurement_unit'])
+            for record in records for item in record['ingredients']
+        } - self.ingredients.keys()
+        if keys:
+            self.ingredients.update(self.lookup_ingredients(keys))
+            missing = keys - self.ingredients.keys()
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in missing
+                ),
+                ignore_conflicts=True,
+            )
+            created = self.lookup_ingredients(missing)
+            ChangeEvent.objects.record(ChangeEvent.CREATED, (
+                Ingredient(id=pk) for pk in created.values()
+            ))
+            self.ingredients.update(created)
+        return self.ingredients
+
+    def lookup_ingredients(self, keys):
+        if not keys:
+            return {}
+        return {
+            (name, unit): ingredient_id
+            for ingredient_id, name, unit in Ingredient.objects.filter(
+                name__in={name for name, _ in keys}
+            ).values_list('id', 'name', 'measurement_unit')
+            if (name, unit) in keys
+        }
+
+    def exclude_existing(self, recipes, rows):
+        if not recipes:
+            return recipes, rows
+        existing = set(Recipe.objects.filter(
+            author_id__in={recipe.author_id for recipe in recipes},
+            pub_date__in={recipe.pub_date for recipe in recipes},
+        ).values_list('author_id', 'pub_date', 'name'))
+        if not existing:
+            return recipes, rows
+        kept = [
+            (recipe, row) for recipe, row in zip(recipes, rows)
+            if (recipe.author_id, recipe.pub_date, recipe.name) not in existing
+        ]
+        self.counts['existing'] += len(recipes) - len(kept)
+        return [recipe for recipe, _ in kept], [row for _, row in kept]
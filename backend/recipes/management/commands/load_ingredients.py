@@ -1,22 +1,173 @@
 import csv
+import io
+import json
+import re
+import time
+from itertools import islice
+from pathlib import Path
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
 
+from outbox.models import ChangeEvent
 from recipes.models import Ingredient
 
+FORMATS = ('csv', 'json', 'jsonl')
+NAME_MAX_LENGTH = Ingredient._meta.get_field('name').max_length
+UNIT_MAX_LENGTH = Ingredient._meta.get_field('measurement_unit').max_length
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def read_jsonl(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_json(file, chunk_size=1 << 16):
+    """Yield the objects of a top-level JSON array without loading it."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('JSON input must be an array of objects')
+    position = 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'jsonl': read_jsonl}
+
 
 class Command(BaseCommand):
-    help = 'Load data from csv files'
-
-    def handle(self, *args, **kwargs):
-        data_path = settings.BASE_DIR
-        with open(
-            data_path / 'data/ingredients.csv', 'r', encoding='utf-8'
-        ) as file:
-            reader = csv.DictReader(file)
+    help = 'Load ingredients from a csv, json or jsonl file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', type=Path,
+            default=settings.BASE_DIR / 'data/ingredients.csv',
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Unknown format "{file_format}", use --format'
+            )
+        dry_run = options['dry_run']
+        self.planned = set()
+        use_copy = connection.vendor == 'postgresql' and not dry_run
+        counts = dict.fromkeys(('inserted', 'unchanged', 'skipped'), 0)
+        total = 0
+        started = time.monotonic()
+
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            rows = self.clean(READERS[file_format](file), counts)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                keys = list(dict.fromkeys(batch))
+                counts['skipped'] += len(batch) - len(keys)
+                if use_copy:
+                    inserted = self.copy_batch(keys)
+                else:
+                    inserted = self.insert_batch(keys, dry_run)
+                counts['inserted'] += inserted
+                counts['unchanged'] += len(keys) - inserted
+                total += len(batch)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{total} rows, {total / elapsed:.0f} rows/s'
+                )
+
+        elapsed = time.monotonic() - started
+        prefix = 'Would load' if dry_run else 'Loaded'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} ingredients in {elapsed:.2f}s: '
+            f'{counts["inserted"]} inserted, 0 updated, '
+            f'{counts["unchanged"]} unchanged, {counts["skipped"]} skipped'
+        ))
+
+    def clean(self, rows, counts):
+        for row in rows:
+            name = str(row.get('name') or '').strip()
+            unit = str(row.get('measurement_unit') or '').strip()
+            if (
+                not name or not unit
+                or len(name) > NAME_MAX_LENGTH
+                or len(unit) > UNIT_MAX_LENGTH
+            ):
+                counts['skipped'] += 1
+                continue
+            yield name, unit
+
+    def insert_batch(self, keys, dry_run):
+        existing = set(Ingredient.objects.filter(
+            name__in={name for name, _ in keys}
+        ).values_list('name', 'measurement_unit'))
+        new = [
+            key for key in keys
+            if key not in existing and key not in self.planned
+        ]
+        if dry_run:
+            self.planned.update(new)
+            return len(new)
+        with transaction.atomic():
             Ingredient.objects.bulk_create(
-                Ingredient(**data) for data in reader
+                (
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in new
+                ),
+                ignore_conflicts=True,
             )
+            keys = set(new)
+            ChangeEvent.objects.record(ChangeEvent.CREATED, (
+                ingredient for ingredient in Ingredient.objects.filter(
+                    name__in={name for name, _ in keys}
+                ) if (ingredient.name, ingredient.measurement_unit) in keys
+            ))
+        return len(new)
 
-        self.stdout.write(self.style.SUCCESS('Successfully load data'))
+    @transaction.atomic
+    def copy_batch(self, keys):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(keys)
+        buffer.seek(0)
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_import '
+                '(name varchar, measurement_unit varchar) ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredient_import FROM STDIN WITH (FORMAT csv)', buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT name, measurement_unit FROM ingredient_import '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING '
+                'RETURNING id'
+            )
+            inserted = [Ingredient(id=pk) for pk, in cursor.fetchall()]
+        ChangeEvent.objects.record(ChangeEvent.CREATED, inserted)
+        return len(inserted)
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild aggregated shopping lists from shopping carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='*', type=int)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user_ids = options['users'] or list(
+            User.objects.values_list('id', flat=True)
+        )
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            with transaction.atomic():
+                ShoppingListItem.rebuild(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt shopping lists of {len(user_ids)} users'
+        ))
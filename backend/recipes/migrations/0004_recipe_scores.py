@@ -0,0 +1,65 @@
+# Generated by Django 3.2.9 on 2026-10-19 09:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0003_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('favorite', 'Added to favorites'), ('shopping_cart', 'Added to shopping cart')], max_length=16, verbose_name='Activity kind')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Activity date')),
+            ],
+            options={
+                'verbose_name': 'Действие с рецептом',
+                'verbose_name_plural': 'Действия с рецептами',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='recipes.recipe', verbose_name='Recipe')),
+                ('favorites_day', models.PositiveIntegerField(default=0)),
+                ('favorites_week', models.PositiveIntegerField(default=0)),
+                ('favorites_total', models.PositiveIntegerField(default=0)),
+                ('carts_day', models.PositiveIntegerField(default=0)),
+                ('carts_week', models.PositiveIntegerField(default=0)),
+                ('carts_total', models.PositiveIntegerField(default=0)),
+                ('popular', models.FloatField(default=0, verbose_name='Popular score')),
+                ('trending', models.FloatField(default=0, verbose_name='Trending score')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Score date')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-popular', '-recipe'], name='score_popular'),
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-trending', '-recipe'], name='score_trending'),
+        ),
+        migrations.AddField(
+            model_name='recipeactivity',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='recipes.recipe', verbose_name='Recipe'),
+        ),
+        migrations.AddField(
+            model_name='recipeactivity',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='User'),
+        ),
+    ]
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+RELATIONS = (
+    ('FavoriteRecipe', 'FavoriteRecipeRow'),
+    ('ShoppingCart', 'ShoppingCartRow'),
+)
+
+
+def copy_to_relations(apps, schema_editor):
+    for container_name, relation_name in RELATIONS:
+        container = apps.get_model('recipes', container_name)
+        relation = apps.get_model('recipes', relation_name)
+        rows = container.recipe.through.objects.values_list(
+            f'{container_name.lower()}__user_id', 'recipe_id'
+        )
+        relation.objects.bulk_create(
+            (
+                relation(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in rows.iterator()
+            ),
+            batch_size=5000,
+        )
+
+
+def copy_to_containers(apps, schema_editor):
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    for container_name, relation_name in RELATIONS:
+        container = apps.get_model('recipes', container_name)
+        relation = apps.get_model('recipes', relation_name)
+        through = container.recipe.through
+        container.objects.bulk_create(
+            (
+                container(user_id=user_id) for user_id in
+                user_model.objects.values_list('id', flat=True).iterator()
+            ),
+            batch_size=5000,
+        )
+        containers = dict(container.objects.values_list('user_id', 'id'))
+        through.objects.bulk_create(
+            (
+                through(**{
+                    f'{container_name.lower()}_id': containers[user_id],
+                    'recipe_id': recipe_id,
+                })
+                for user_id, recipe_id in relation.objects.values_list(
+                    'user_id', 'recipe_id'
+                ).iterator()
+            ),
+            batch_size=5000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0004_recipe_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FavoriteRecipeRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Favorite date')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe', verbose_name='Favorite recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Избранный рецепт',
+                'verbose_name_plural': 'Избранные рецепты',
+            },
+        ),
+        migrations.CreateModel(
+            name='ShoppingCartRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Added date')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe', verbose_name='Recipe in shopping cart')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Корзина с рецептом',
+                'verbose_name_plural': 'Корзина с рецептами',
+            },
+        ),
+        migrations.RunPython(copy_to_relations, copy_to_containers),
+        migrations.DeleteModel(
+            name='FavoriteRecipe',
+        ),
+        migrations.DeleteModel(
+            name='ShoppingCart',
+        ),
+        migrations.RenameModel(
+            old_name='FavoriteRecipeRow',
+            new_name='FavoriteRecipe',
+        ),
+        migrations.RenameModel(
+            old_name='ShoppingCartRow',
+            new_name='ShoppingCart',
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorite_recipe', to='recipes.recipe', verbose_name='Favorite recipe'),
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorite_recipe', to=settings.AUTH_USER_MODEL, verbose_name='User'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart', to='recipes.recipe', verbose_name='Recipe in shopping cart'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart', to=settings.AUTH_USER_MODEL, verbose_name='User'),
+        ),
+        migrations.AddConstraint(
+            model_name='favoriterecipe',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique favorite recipe'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique shopping cart recipe'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.9 on 2026-10-19 09:13
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+AMOUNT_MODELS = (
+    ('RecipeIngredient', 'recipe_id'),
+    ('ShoppingListItem', 'user_id'),
+)
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    ingredient = apps.get_model('recipes', 'Ingredient')
+    duplicates = ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep=Min('id'), count=Count('id')).filter(count__gt=1)
+    for group in duplicates.order_by().iterator():
+        ids = list(ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).values_list('id', flat=True))
+        for model_name, owner in AMOUNT_MODELS:
+            model = apps.get_model('recipes', model_name)
+            rows = model.objects.filter(ingredient_id__in=ids)
+            totals = defaultdict(int)
+            for owner_id, amount in rows.values_list(owner, 'amount'):
+                totals[owner_id] += amount
+            rows.delete()
+            model.objects.bulk_create(
+                model(**{
+                    owner: owner_id,
+                    'ingredient_id': group['keep'],
+                    'amount': amount,
+                })
+                for owner_id, amount in totals.items()
+            )
+        ingredient.objects.filter(id__in=ids).exclude(
+            id=group['keep']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0006_shopping_list'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop,
+            atomic=True,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique ingredient name and unit'),
+        ),
+    ]
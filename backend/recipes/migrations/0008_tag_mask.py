@@ -0,0 +1,62 @@
+# Generated by Django 3.2.9 on 2026-10-19 10:41
+
+from django.db import migrations, models
+
+
+def fill_tag_masks(apps, schema_editor):
+    tag = apps.get_model('recipes', 'Tag')
+    recipe = apps.get_model('recipes', 'Recipe')
+    recipe_tag = apps.get_model('recipes', 'RecipeTag')
+    tags = list(tag.objects.order_by('id'))
+    if len(tags) > 63:
+        raise RuntimeError('Tag bitmask supports at most 63 tags')
+    for bit, item in enumerate(tags):
+        item.bit = bit
+    tag.objects.bulk_update(tags, ['bit'])
+
+    masks = {}
+    rows = recipe_tag.objects.order_by('recipe_id').values_list(
+        'recipe_id', 'tag__bit'
+    )
+    for recipe_id, bit in rows.iterator():
+        if recipe_id not in masks and len(masks) >= 5000:
+            recipe.objects.bulk_update(
+                [recipe(id=pk, tag_mask=mask) for pk, mask in masks.items()],
+                ['tag_mask'], batch_size=1000,
+            )
+            masks = {}
+        masks[recipe_id] = masks.get(recipe_id, 0) | 1 << bit
+    recipe.objects.bulk_update(
+        [recipe(id=pk, tag_mask=mask) for pk, mask in masks.items()],
+        ['tag_mask'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_unique_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_mask',
+            field=models.BigIntegerField(default=0, verbose_name='Tag bits'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='tag bit'),
+        ),
+        migrations.RunPython(fill_tag_masks, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, unique=True, verbose_name='tag bit'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', 'tag_mask'], name='recipe_date_tags'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.9 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_tag_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favoriterecipe',
+            index=models.Index(fields=['user', '-created'], name='favorite_user_created'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppingcart',
+            index=models.Index(fields=['user', '-created'], name='cart_user_created'),
+        ),
+    ]
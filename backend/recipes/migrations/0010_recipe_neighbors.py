@@ -0,0 +1,27 @@
+# Generated by Django 3.2.9 on 2026-10-19 15:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_relation_user_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeNeighbors',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbors', serialize=False, to='recipes.recipe', verbose_name='Recipe')),
+                ('recipe_ids', models.BinaryField(verbose_name='Neighbor ids')),
+                ('scores', models.BinaryField(verbose_name='Neighbor scores')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Neighbors date')),
+            ],
+            options={
+                'verbose_name': 'Похожие рецепты',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+    ]
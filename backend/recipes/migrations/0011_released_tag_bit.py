@@ -0,0 +1,25 @@
+# Generated by Django 3.2.9 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_neighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReleasedTagBit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bit', models.PositiveSmallIntegerField(unique=True, verbose_name='tag bit')),
+                ('released', models.DateTimeField(auto_now=True, verbose_name='Release date')),
+            ],
+            options={
+                'verbose_name': 'Освобождённый бит тэга',
+                'verbose_name_plural': 'Освобождённые биты тэгов',
+            },
+        ),
+    ]
@@ -1,9 +1,22 @@
+import heapq
+import struct
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from outbox.models import ChangeEvent
+
 User = get_user_model()
 
 
@@ -23,15 +36,59 @@ class Recipe(models.Model):
                                          through='RecipeIngredient')
     tags = models.ManyToManyField('Tag', through='RecipeTag')
     pub_date = models.DateTimeField(_('Pub date'), auto_now_add=True,)
+    feed_pushed = models.BooleanField(_('Pushed to feeds'), default=False)
+    tag_mask = models.BigIntegerField(_('Tag bits'), default=0)
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         condition=Q(feed_pushed=False),
+                         name='recipe_not_pushed'),
+            models.Index(fields=['-pub_date', 'tag_mask'],
+                         name='recipe_date_tags'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.author.email}, {self.name}'
 
+    @classmethod
+    def update_tag_masks(cls, recipe_ids):
+        masks = dict.fromkeys(recipe_ids, 0)
+        for recipe_id, bit in RecipeTag.objects.filter(
+            recipe_id__in=masks
+        ).values_list('recipe_id', 'tag__bit'):
+            masks[recipe_id] |= 1 << bit
+        cls.objects.bulk_update(
+            [cls(id=pk, tag_mask=mask) for pk, mask in masks.items()],
+            ['tag_mask'], batch_size=1000,
+        )
+
+    @classmethod
+    def clear_tag_bit(cls, bit):
+        cls.objects.alias(
+            tag_hits=F('tag_mask').bitand(1 << bit)
+        ).filter(tag_hits__gt=0).update(
+            tag_mask=F('tag_mask').bitand(~(1 << bit))
+        )
+
+    @receiver(m2m_changed, sender='recipes.RecipeTag')
+    def tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        if not reverse:
+            Recipe.update_tag_masks([instance.pk])
+            ChangeEvent.objects.record(ChangeEvent.UPDATED, [instance])
+        elif action == 'post_clear':
+            Recipe.clear_tag_bit(instance.bit)
+        else:
+            Recipe.update_tag_masks(pk_set)
+            ChangeEvent.objects.record(
+                ChangeEvent.UPDATED, Recipe.objects.filter(pk__in=pk_set)
+            )
+
 
 class RecipeIngredient(models.Model):
 
@@ -61,9 +118,16 @@ class RecipeTag(models.Model):
 
 class Tag(models.Model):
 
+    # Recipe.tag_mask is a signed 64-bit integer, so tags use bits 0-62.
+    MAX_TAGS = 63
+    CATALOG_CACHE_KEY = 'tag-catalog'
+
     name = models.CharField(_('tag name'), max_length=200, unique=True)
     color = models.CharField(_('tag hexcolor'), max_length=7, unique=True)
     slug = models.SlugField(_('tag slug'), max_length=200, unique=True)
+    bit = models.PositiveSmallIntegerField(
+        _('tag bit'), unique=True, editable=False,
+    )
 
     class Meta:
         verbose_name = 'Тэг'
@@ -72,6 +136,73 @@ class Tag(models.Model):
     def __str__(self):
         return f'{self.name}, {self.slug}'
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit = self.free_bit()
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def free_bit(cls):
+        """Lowest bit no tag uses and no worker may still map to a tag.
+
+        Other workers keep a cached catalog for TAG_CATALOG_TIMEOUT
+        seconds, so the bit of a deleted tag is not handed out again
+        before their copies expire.
+        """
+        used = set(cls.objects.values_list('bit', flat=True))
+        used.update(ReleasedTagBit.objects.filter(
+            released__gt=timezone.now() - timedelta(
+                seconds=settings.TAG_CATALOG_TIMEOUT
+            )
+        ).values_list('bit', flat=True))
+        for bit in range(cls.MAX_TAGS):
+            if bit not in used:
+                return bit
+        raise ValidationError(f'Нельзя создать больше {cls.MAX_TAGS} тэгов')
+
+    @classmethod
+    def catalog(cls):
+        catalog = cache.get(cls.CATALOG_CACHE_KEY)
+        if catalog is None:
+            catalog = list(cls.objects.order_by('id').values(
+                'id', 'name', 'color', 'slug', 'bit'
+            ))
+            cache.set(
+                cls.CATALOG_CACHE_KEY, catalog, settings.TAG_CATALOG_TIMEOUT
+            )
+        return catalog
+
+    @classmethod
+    def mask(cls, slugs):
+        slugs = set(slugs)
+        mask = 0
+        for tag in cls.catalog():
+            if tag['slug'] in slugs:
+                mask |= 1 << tag['bit']
+        return mask
+
+    @receiver([post_save, post_delete], sender='recipes.Tag')
+    def clear_catalog(sender, **kwargs):
+        cache.delete(Tag.CATALOG_CACHE_KEY)
+
+    @receiver(post_delete, sender='recipes.Tag')
+    def release_bit(sender, instance, **kwargs):
+        Recipe.clear_tag_bit(instance.bit)
+        ReleasedTagBit.objects.update_or_create(bit=instance.bit)
+
+
+class ReleasedTagBit(models.Model):
+
+    bit = models.PositiveSmallIntegerField(_('tag bit'), unique=True)
+    released = models.DateTimeField(_('Release date'), auto_now=True)
+
+    class Meta:
+        verbose_name = 'Освобождённый бит тэга'
+        verbose_name_plural = 'Освобождённые биты тэгов'
+
+    def __str__(self):
+        return f'{self.bit}, {self.released}'
+
 
 class Ingredient(models.Model):
 
@@ -82,6 +213,11 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique ingredient name and unit')
+        ]
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
@@ -116,59 +252,458 @@ class Subscribe(models.Model):
         return f'follower: {self.follower} - following: {self.following}'
 
 
+class RecipeRelationManager(models.Manager):
+
+    @staticmethod
+    def lock(user):
+        """Serialize changes of ``user``'s rows until the transaction ends.
+
+        What ``add`` and ``remove`` read as present stays true until they
+        commit, so two concurrent requests cannot both add the same recipe.
+        """
+        list(User.objects.select_for_update().filter(
+            pk=user.pk
+        ).values_list('pk', flat=True))
+
+    def add(self, user, recipes):
+        with transaction.atomic():
+            self.lock(user)
+            present = set(self.filter(
+                user=user, recipe__in=recipes
+            ).values_list('recipe_id', flat=True))
+            added = [recipe for recipe in recipes if recipe.id not in present]
+            self.bulk_create(
+                (self.model(user=user, recipe=recipe) for recipe in added),
+                ignore_conflicts=True,
+            )
+            ChangeEvent.objects.record(ChangeEvent.CREATED, self.filter(
+                user=user, recipe__in=added
+            ))
+        return added
+
+    def remove(self, user, recipe_ids):
+        self.filter(user=user, recipe_id__in=recipe_ids).delete()
+
+
+class ShoppingCartManager(RecipeRelationManager):
+
+    @transaction.atomic
+    def add(self, user, recipes):
+        added = super().add(user, recipes)
+        ShoppingListItem.apply(
+            [user.id], ShoppingListItem.recipe_amounts(added)
+        )
+        return added
+
+    @transaction.atomic
+    def remove(self, user, recipe_ids):
+        self.lock(user)
+        removed = list(self.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+        super().remove(user, removed)
+        ShoppingListItem.apply([user.id], {
+            ingredient_id: -amount for ingredient_id, amount
+            in ShoppingListItem.recipe_amounts(removed).items()
+        })
+
+    @transaction.atomic
+    def clear(self, user):
+        self.lock(user)
+        self.filter(user=user).delete()
+        ShoppingListItem.objects.filter(user=user).delete()
+
+
 class FavoriteRecipe(models.Model):
 
-    user = models.OneToOneField(
+    user = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name='favorite_recipe',
         verbose_name=_('User'),
     )
-    recipe = models.ManyToManyField(
-        Recipe,
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
         related_name='favorite_recipe',
-        verbose_name=_('Favorite recipe')
+        verbose_name=_('Favorite recipe'),
     )
+    created = models.DateTimeField(_('Favorite date'), auto_now_add=True)
+
+    objects = RecipeRelationManager()
 
     class Meta:
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique favorite recipe')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created'],
+                         name='favorite_user_created'),
+        ]
 
     def __str__(self) -> str:
-        return (
-            f'{self.user}, '
-            f'{[i.name for i in self.recipe.all()]}'
-        )
-
-    @receiver(post_save, sender=User)
-    def create_empty_favorite_recipe(sender, instance, created, **kwargs):
-        if created:
-            FavoriteRecipe.objects.create(user=instance)
+        return f'{self.user}, {self.recipe.name}'
 
 
 class ShoppingCart(models.Model):
 
-    user = models.OneToOneField(
+    user = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name='shopping_cart',
         verbose_name=_('User'),
     )
-    recipe = models.ManyToManyField(
-        Recipe,
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
         related_name='shopping_cart',
-        verbose_name=_('Recipe in shopping cart')
+        verbose_name=_('Recipe in shopping cart'),
     )
+    created = models.DateTimeField(_('Added date'), auto_now_add=True)
+
+    objects = ShoppingCartManager()
 
     class Meta:
         verbose_name = 'Корзина с рецептом'
         verbose_name_plural = 'Корзина с рецептами'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique shopping cart recipe')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created'],
+                         name='cart_user_created'),
+        ]
 
     def __str__(self) -> str:
-        return (
-            f'{self.user}, '
-            f'{[i.name for i in self.recipe.all()]}'
+        return f'{self.user}, {self.recipe.name}'
+
+
+class ShoppingListItem(models.Model):
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name=_('User'),
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Ingredient'),
+    )
+    amount = models.BigIntegerField(_('Amount of ingredient'))
+
+    class Meta:
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique shopping list item')
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}, {self.ingredient_id}: {self.amount}'
+
+    @staticmethod
+    def recipe_amounts(recipes):
+        if not recipes:
+            return {}
+        return dict(
+            RecipeIngredient.objects.filter(recipe__in=recipes).values(
+                'ingredient_id'
+            ).annotate(total=Sum('amount')).values_list(
+                'ingredient_id', 'total'
+            ).order_by()
+        )
+
+    @classmethod
+    def apply(cls, user_ids, deltas):
+        deltas = {
+            ingredient_id: delta for ingredient_id, delta in deltas.items()
+            if delta
+        }
+        if not user_ids or not deltas:
+            return
+        cls.objects.bulk_create(
+            (
+                cls(user_id=user_id, ingredient_id=ingredient_id, amount=0)
+                for user_id in user_ids for ingredient_id in deltas
+            ),
+            batch_size=1000, ignore_conflicts=True,
+        )
+        items = cls.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=deltas
+        )
+        items.update(amount=F('amount') + Case(
+            *(
+                When(ingredient_id=ingredient_id, then=Value(delta))
+                for ingredient_id, delta in deltas.items()
+            ),
+            output_field=models.BigIntegerField(),
+        ))
+        items.filter(amount__lte=0).delete()
+
+    @classmethod
+    @contextmanager
+    def tracking(cls, recipe):
+        user_ids = list(ShoppingCart.objects.filter(
+            recipe=recipe
+        ).values_list('user_id', flat=True))
+        before = cls.recipe_amounts([recipe.id]) if user_ids else {}
+        yield
+        if user_ids:
+            after = cls.recipe_amounts([recipe.id])
+            cls.apply(user_ids, {
+                ingredient_id: (
+                    after.get(ingredient_id, 0) - before.get(ingredient_id, 0)
+                )
+                for ingredient_id in before.keys() | after.keys()
+            })
+
+    @classmethod
+    def rebuild(cls, user_ids):
+        cls.objects.filter(user_id__in=user_ids).delete()
+        totals = ShoppingCart.objects.filter(
+            user_id__in=user_ids, recipe__recipe__isnull=False
+        ).values(
+            'user_id', 'recipe__recipe__ingredient_id'
+        ).annotate(total=Sum('recipe__recipe__amount')).order_by()
+        cls.objects.bulk_create(
+            (
+                cls(user_id=row['user_id'],
+                    ingredient_id=row['recipe__recipe__ingredient_id'],
+                    amount=row['total'])
+                for row in totals.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+class RecipeActivity(models.Model):
+
+    FAVORITE = 'favorite'
+    SHOPPING_CART = 'shopping_cart'
+    KINDS = (
+        (FAVORITE, _('Added to favorites')),
+        (SHOPPING_CART, _('Added to shopping cart')),
+    )
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('User'),
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name=_('Recipe'),
+    )
+    kind = models.CharField(_('Activity kind'), max_length=16, choices=KINDS)
+    created = models.DateTimeField(
+        _('Activity date'), auto_now_add=True, db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Действие с рецептом'
+        verbose_name_plural = 'Действия с рецептами'
+
+    def __str__(self):
+        return f'{self.user_id}, {self.kind}, {self.recipe_id}'
+
+    @classmethod
+    def record(cls, user, recipes, kind):
+        cls.objects.bulk_create(
+            cls(user=user, recipe=recipe, kind=kind) for recipe in recipes
+        )
+
+
+class RecipeScore(models.Model):
+
+    RANKINGS = ('popular', 'trending')
+
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name=_('Recipe'),
+    )
+    favorites_day = models.PositiveIntegerField(default=0)
+    favorites_week = models.PositiveIntegerField(default=0)
+    favorites_total = models.PositiveIntegerField(default=0)
+    carts_day = models.PositiveIntegerField(default=0)
+    carts_week = models.PositiveIntegerField(default=0)
+    carts_total = models.PositiveIntegerField(default=0)
+    popular = models.FloatField(_('Popular score'), default=0)
+    trending = models.FloatField(_('Trending score'), default=0)
+    updated = models.DateTimeField(_('Score date'), auto_now=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(fields=['-popular', '-recipe'],
+                         name='score_popular'),
+            models.Index(fields=['-trending', '-recipe'],
+                         name='score_trending'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}, {self.popular}, {self.trending}'
+
+
+class RecipeNeighbors(models.Model):
+    """Most similar recipes, best first, built by build_recipe_neighbors.
+
+    Ids and scores are packed little-endian int64 and float32 arrays, so
+    a recipe's whole list is one row read by primary key.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='neighbors',
+        verbose_name=_('Recipe'),
+    )
+    recipe_ids = models.BinaryField(_('Neighbor ids'))
+    scores = models.BinaryField(_('Neighbor scores'))
+    updated = models.DateTimeField(_('Neighbors date'), auto_now=True)
+
+    class Meta:
+        verbose_name = 'Похожие рецепты'
+        verbose_name_plural = 'Похожие рецепты'
+
+    def __str__(self):
+        return f'{self.recipe_id}, {len(self.recipe_ids) // 8}'
+
+    def neighbors(self):
+        recipe_ids, scores = bytes(self.recipe_ids), bytes(self.scores)
+        return list(zip(
+            struct.unpack(f'<{len(recipe_ids) // 8}q', recipe_ids),
+            struct.unpack(f'<{len(scores) // 4}f', scores),
+        ))
+
+    @classmethod
+    def recommend(cls, recipe_ids, limit):
+        """Recipes closest to all of ``recipe_ids``, best first.
+
+        Scores of every list are summed, and the seeds themselves are
+        left out.
+        """
+        seeds = set(recipe_ids)
+        scores = {}
+        for row in cls.objects.filter(recipe_id__in=seeds):
+            for recipe_id, score in row.neighbors():
+                if recipe_id not in seeds:
+                    scores[recipe_id] = scores.get(recipe_id, 0) + score
+        return heapq.nlargest(limit, scores, key=scores.__getitem__)
+
+
+class FeedEntry(models.Model):
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name=_('Subscriber'),
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name=_('Recipe'),
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Recipe author'),
+    )
+    pub_date = models.DateTimeField(_('Pub date'))
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique feed entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-recipe'],
+                         name='feed_user_date'),
+            models.Index(fields=['user', 'author'], name='feed_user_author'),
+        ]
+
+    def __str__(self):
+        return f'{self.user}, {self.recipe_id}'
+
+    @classmethod
+    def page(cls, user, limit, before=None):
+        pushed = cls.objects.filter(user=user).order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('pub_date', 'recipe_id')
+        pulled = Recipe.objects.filter(
+            feed_pushed=False,
+            author__in=user.follower.values('following_id'),
+        ).order_by('-pub_date', '-id').values_list('pub_date', 'id')
+        if before is not None:
+            pub_date, recipe_id = before
+            pushed = pushed.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, recipe_id__lt=recipe_id)
+            )
+            pulled = pulled.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, id__lt=recipe_id)
+            )
+        return list(islice(
+            heapq.merge(pushed[:limit], pulled[:limit], reverse=True), limit
+        ))
+
+    @classmethod
+    def fan_out(cls, recipe):
+        followers = Subscribe.objects.filter(
+            following_id=recipe.author_id
+        ).values_list('follower_id', flat=True)
+        if followers.count() > settings.FEED_FANOUT_MAX_FOLLOWERS:
+            return False
+        cls.objects.bulk_create(
+            (
+                cls(user_id=follower_id, recipe=recipe,
+                    author_id=recipe.author_id, pub_date=recipe.pub_date)
+                for follower_id in followers.iterator()
+            ),
+            batch_size=1000, ignore_conflicts=True,
+        )
+        Recipe.objects.filter(pk=recipe.pk).update(feed_pushed=True)
+        recipe.feed_pushed = True
+        return True
+
+    @classmethod
+    def backfill(cls, subscribe):
+        recipes = Recipe.objects.filter(
+            author_id=subscribe.following_id, feed_pushed=True
+        ).values_list('id', 'pub_date')[:settings.FEED_BACKFILL_SIZE]
+        cls.objects.bulk_create(
+            (
+                cls(user_id=subscribe.follower_id, recipe_id=recipe_id,
+                    author_id=subscribe.following_id, pub_date=pub_date)
+                for recipe_id, pub_date in recipes
+            ),
+            ignore_conflicts=True,
         )
 
-    @receiver(post_save, sender=User)
-    def create_empty_shopping_cart(sender, instance, created, **kwargs):
-        if created:
-            ShoppingCart.objects.create(user=instance)
+    @receiver(post_save, sender=Recipe)
+    def push_recipe_to_feeds(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            FeedEntry.fan_out(instance)
+
+    @receiver(post_save, sender=Subscribe)
+    def backfill_feed(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            FeedEntry.backfill(instance)
+
+    @receiver(post_delete, sender=Subscribe)
+    def clear_feed(sender, instance, **kwargs):
+        FeedEntry.objects.filter(
+            user_id=instance.follower_id, author_id=instance.following_id
+        ).delete()
@@ -0,0 +1,135 @@
+"""Item-to-item recipe similarity with sparse matrices.
+
+Only management commands import this module, so the API workers never
+load NumPy and SciPy.
+"""
+import io
+from itertools import chain
+
+import numpy as np
+from django.db import connections
+from scipy import sparse
+
+
+def export_pairs(queryset, *fields):
+    """Return an (n, len(fields)) int64 array of every row's ``fields``.
+
+    PostgreSQL streams the rows with COPY, which is several times faster
+    than building a tuple per row.
+    """
+    connection = connections[queryset.db]
+    values = queryset.values_list(*fields).order_by()
+    if connection.vendor != 'postgresql':
+        return np.fromiter(
+            chain.from_iterable(values.iterator(chunk_size=10000)),
+            dtype=np.int64,
+        ).reshape(-1, len(fields))
+    sql, params = values.query.sql_with_params()
+    buffer = io.StringIO()
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            cursor.mogrify(f'COPY ({sql}) TO STDOUT', params).decode(),
+            buffer,
+        )
+    text = buffer.getvalue().strip()
+    if not text:
+        return np.empty((0, len(fields)), dtype=np.int64)
+    return np.fromstring(
+        text.replace('\n', ' ').replace('\t', ' '), dtype=np.int64, sep=' '
+    ).reshape(-1, len(fields))
+
+
+def positions(ids, values):
+    """Positions of ``values`` in the sorted ``ids``, -1 when missing."""
+    found = np.searchsorted(ids, values)
+    found[found == len(ids)] = 0
+    return np.where(ids[found] == values, found, -1)
+
+
+def diagonal(values):
+    size = len(values)
+    return sparse.csr_matrix(
+        (values, (np.arange(size), np.arange(size))), shape=(size, size)
+    )
+
+
+def normalize_columns(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    return (matrix @ diagonal((1 / norms).astype(np.float32))).tocsr()
+
+
+def behavior_matrix(users, recipes, weights, recipe_count):
+    """User-by-recipe matrix with cosine-normalized recipe columns.
+
+    Rows of very active users are damped by the log of their size, so a
+    few accounts that favorited everything do not make all recipes
+    similar.
+    """
+    user_ids, users = np.unique(users, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (weights.astype(np.float32), (users, recipes)),
+        shape=(len(user_ids), recipe_count),
+    )
+    matrix.sum_duplicates()
+    sizes = np.diff(matrix.indptr)
+    damping = 1 / np.log1p(np.maximum(sizes, 1)).astype(np.float32)
+    return normalize_columns(diagonal(damping) @ matrix)
+
+
+def ingredient_matrix(recipes, ingredients, recipe_count, max_share):
+    """Recipe-by-ingredient TF-IDF matrix with unit-length rows.
+
+    Ingredients found in more than ``max_share`` of the recipes, such as
+    salt, say little about similarity and would make every pair of
+    recipes a candidate, so they are left out.
+    """
+    ingredient_ids, ingredients = np.unique(ingredients, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(recipes), dtype=np.float32), (recipes, ingredients)),
+        shape=(recipe_count, len(ingredient_ids)),
+    )
+    matrix.data[:] = 1
+    frequency = np.diff(matrix.tocsc().indptr)
+    weights = np.log(max(recipe_count, 1) / np.maximum(frequency, 1))
+    weights[frequency > max_share * recipe_count] = 0
+    matrix = (matrix @ diagonal(weights.astype(np.float32))).tocsr()
+    matrix.eliminate_zeros()
+    return normalize_columns(matrix.T).T.tocsr()
+
+
+def top_k(similarity, k, offset):
+    """Best ``k`` columns of every row, without the row's own recipe.
+
+    Returns (row, column, score) arrays sorted by row, best first.
+    """
+    similarity = similarity.tocoo()
+    keep = (similarity.col != similarity.row + offset) & (similarity.data > 0)
+    rows, cols, data = (
+        similarity.row[keep], similarity.col[keep], similarity.data[keep]
+    )
+    order = np.lexsort((-data, rows))
+    rows, cols, data = rows[order], cols[order], data[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    keep = rank < k
+    return rows[keep] + offset, cols[keep], data[keep]
+
+
+def neighbors(behavior, ingredients, k, alpha, batch_size):
+    """Yield (row, column, score) arrays of the top ``k`` neighbors.
+
+    The score is ``alpha`` times the cosine similarity of co-favorites
+    and carts plus the rest times the ingredient overlap. Rows are
+    computed ``batch_size`` recipes at a time, so only one slice of the
+    recipe-by-recipe product is in memory.
+    """
+    behavior_rows, behavior = behavior.T.tocsr(), behavior.tocsc()
+    ingredients_t = ingredients.T.tocsc()
+    recipe_count = ingredients.shape[0]
+    for start in range(0, recipe_count, batch_size):
+        stop = min(start + batch_size, recipe_count)
+        similarity = (
+            alpha * (behavior_rows[start:stop] @ behavior)
+            + (1 - alpha) * (ingredients[start:stop] @ ingredients_t)
+        )
+        yield top_k(similarity, k, start)
@@ -0,0 +1,322 @@
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import Ingredient, RecipeScore, Tag
+
+MAGIC = b'FGCATLG1'
+HEADER = struct.Struct('<8sI')
+# Section name, array typecode, offset in the file, number of items.
+ENTRY = struct.Struct('<32sc7xQQ')
+ALIGNMENT = 8
+
+_state = {'snapshot': None, 'checked': None, 'rejected': None}
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def string_column(values):
+    """Pack strings into an offsets array and one UTF-8 blob."""
+    offsets, data = array('q', [0]), bytearray()
+    for value in values:
+        data += value.encode()
+        offsets.append(len(data))
+    return offsets, array('B', data)
+
+
+def write_sections(file, sections):
+    position = HEADER.size + ENTRY.size * len(sections)
+    entries = []
+    for name, values in sections:
+        position += -position % ALIGNMENT
+        entries.append(ENTRY.pack(
+            name.encode(), values.typecode.encode(), position, len(values)
+        ))
+        position += len(values) * values.itemsize
+    file.write(HEADER.pack(MAGIC, len(sections)))
+    file.write(b''.join(entries))
+    for name, values in sections:
+        file.write(b'\0' * (-file.tell() % ALIGNMENT))
+        values.tofile(file)
+
+
+def catalog_sections():
+    """Columns of the ingredient and tag catalog and of the rankings.
+
+    Ingredients are sorted by id and carry a second order by upper-cased
+    name, the one ``name__istartswith`` compares in PostgreSQL. Rankings
+    keep the order of RankingPagination.
+    """
+    sections = []
+
+    def strings(name, values):
+        offsets, data = string_column(values)
+        sections.extend(((f'{name}.offsets', offsets), (f'{name}.data', data)))
+
+    ids, names, units = array('q'), [], []
+    for pk, name, unit in Ingredient.objects.order_by('id').values_list(
+        'id', 'name', 'measurement_unit'
+    ).iterator():
+        ids.append(pk)
+        names.append(name)
+        units.append(unit)
+    by_key = sorted(range(len(names)), key=lambda index: names[index].upper())
+    sections.append(('ingredient.id', ids))
+    strings('ingredient.name', names)
+    strings('ingredient.unit', units)
+    strings('ingredient.key', (names[index].upper() for index in by_key))
+    sections.append(('ingredient.by_key', array('q', by_key)))
+
+    tags = list(Tag.objects.order_by('id').values_list(
+        'id', 'name', 'color', 'slug'
+    ))
+    sections.append(('tag.id', array('q', (tag[0] for tag in tags))))
+    for number, field in enumerate(('name', 'color', 'slug'), 1):
+        strings(f'tag.{field}', (tag[number] for tag in tags))
+
+    for ranking in RecipeScore.RANKINGS:
+        recipes, scores = array('q'), array('d')
+        for recipe_id, score in RecipeScore.objects.order_by(
+            f'-{ranking}', '-recipe_id'
+        ).values_list('recipe_id', ranking).iterator():
+            recipes.append(recipe_id)
+            scores.append(score)
+        sections.extend(
+            ((f'{ranking}.recipe', recipes), (f'{ranking}.score', scores))
+        )
+    return sections
+
+
+def build_snapshot(path=None):
+    """Write a new snapshot next to the current one and swap it in.
+
+    Workers that mapped the old file keep reading it until they notice
+    the new one, and the file at ``path`` is always complete.
+    """
+    path = Path(path or settings.CATALOG_SNAPSHOT_PATH)
+    sections = catalog_sections()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(
+        dir=path.parent, prefix=f'.{path.name}.'
+    )
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            write_sections(file, sections)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path.stat().st_size
+
+
+class Strings:
+    """Read-only sequence over a packed string column."""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return str(
+            self.data[self.offsets[index]:self.offsets[index + 1]], 'utf-8'
+        )
+
+
+class Ranking:
+    """Read-only (recipe id, score) sequence, best first."""
+
+    def __init__(self, recipes, scores):
+        self.recipes = recipes
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(self.recipes[index], self.scores[index]))
+        return self.recipes[index], self.scores[index]
+
+    def count_above(self, score, inclusive=False):
+        """Number of leading items scored higher than ``score``."""
+        low, high = 0, len(self.scores)
+        while low < high:
+            middle = (low + high) // 2
+            value = self.scores[middle]
+            if value > score or inclusive and value == score:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class CatalogSnapshot:
+    """Catalog read from a memory-mapped snapshot file.
+
+    The file is mapped read-only, so every worker on the host shares the
+    same pages of the page cache instead of holding its own copy, and
+    lookups binary-search the columns without building Python objects
+    for the rows they skip.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.stat = os.fstat(file.fileno())
+            self._map = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        view = memoryview(self._map)
+        magic, count = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise SnapshotError(f'{path} is not a catalog snapshot')
+        self.columns = {}
+        for number in range(count):
+            name, typecode, offset, length = ENTRY.unpack_from(
+                view, HEADER.size + ENTRY.size * number
+            )
+            typecode = typecode.decode()
+            size = length * array(typecode).itemsize
+            if offset + size > len(view):
+                raise SnapshotError(f'{path} is truncated')
+            self.columns[name.rstrip(b'\0').decode()] = view[
+                offset:offset + size
+            ].cast(typecode)
+        for name in list(self.columns):
+            if name.endswith('.offsets'):
+                column = name[:-len('.offsets')]
+                self.columns[column] = Strings(
+                    self.columns[name], self.columns[f'{column}.data']
+                )
+
+    def ingredient_at(self, index):
+        return {
+            'id': self.columns['ingredient.id'][index],
+            'name': self.columns['ingredient.name'][index],
+            'measurement_unit': self.columns['ingredient.unit'][index],
+        }
+
+    def ingredient(self, pk):
+        ids = self.columns['ingredient.id']
+        index = bisect_left(ids, pk)
+        if index == len(ids) or ids[index] != pk:
+            return None
+        return self.ingredient_at(index)
+
+    def ingredients(self, prefix=''):
+        if not prefix:
+            indexes = range(len(self.columns['ingredient.id']))
+        else:
+            keys, by_key = (
+                self.columns['ingredient.key'],
+                self.columns['ingredient.by_key'],
+            )
+            prefix = prefix.upper()
+            indexes = []
+            position = bisect_left(keys, prefix)
+            while position < len(keys) and keys[position].startswith(prefix):
+                indexes.append(by_key[position])
+                position += 1
+            indexes.sort()
+        return [self.ingredient_at(index) for index in indexes]
+
+    def tag_at(self, index):
+        return {
+            'id': self.columns['tag.id'][index],
+            'name': self.columns['tag.name'][index],
+            'color': self.columns['tag.color'][index],
+            'slug': self.columns['tag.slug'][index],
+        }
+
+    def tag(self, pk):
+        ids = self.columns['tag.id']
+        index = bisect_left(ids, pk)
+        if index == len(ids) or ids[index] != pk:
+            return None
+        return self.tag_at(index)
+
+    def tags(self):
+        return [
+            self.tag_at(index) for index in range(len(self.columns['tag.id']))
+        ]
+
+    def ranking(self, name):
+        return Ranking(
+            self.columns[f'{name}.recipe'], self.columns[f'{name}.score']
+        )
+
+
+def get_snapshot():
+    """Return the current snapshot, or None to read from the database.
+
+    The file is checked at most every CATALOG_SNAPSHOT_CHECK_INTERVAL
+    seconds and mapped again once it was replaced.
+    """
+    path = settings.CATALOG_SNAPSHOT_PATH
+    if not path:
+        return None
+    now = time.monotonic()
+    checked = _state['checked']
+    if (
+        checked is not None
+        and now - checked < settings.CATALOG_SNAPSHOT_CHECK_INTERVAL
+    ):
+        return _state['snapshot']
+    with _lock:
+        _state['checked'] = now
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            _state['snapshot'] = None
+            return None
+        current = _state['snapshot']
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if version == _state['rejected'] or (
+            current is not None
+            and (current.stat.st_ino, current.stat.st_mtime_ns) == version
+        ):
+            return current
+        try:
+            # The old map is closed once the last request using it ends.
+            _state['snapshot'] = CatalogSnapshot(path)
+        except (SnapshotError, struct.error, ValueError) as error:
+            # A broken file is not retried until it is replaced; requests
+            # keep the previous map, or read from the database without one.
+            _state['rejected'] = version
+            logger.error('Cannot read catalog snapshot %s: %s', path, error)
+    return _state['snapshot']
+
+
+def snapshot_stats():
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+    return {
+        'size': snapshot.stat.st_size,
+        'built': snapshot.stat.st_mtime,
+        'ingredients': len(snapshot.columns['ingredient.id']),
+        'tags': len(snapshot.columns['tag.id']),
+        **{
+            ranking: len(snapshot.columns[f'{ranking}.recipe'])
+            for ranking in RecipeScore.RANKINGS
+        },
+    }
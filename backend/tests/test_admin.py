@@ -0,0 +1,61 @@
+from django.contrib import admin
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+
+from .utils import create_ingredients, create_recipes, create_tags, create_user
+
+
+class ChangelistQueriesTest(TestCase):
+    """Changelists run as many queries for 2 rows as for a full page."""
+
+    models = (Recipe, FavoriteRecipe, ShoppingCart)
+
+    def setUp(self):
+        self.admin = create_user('admin')
+        self.admin.is_staff = self.admin.is_superuser = True
+        self.admin.save()
+        self.client.force_login(self.admin)
+        self.tags = create_tags()
+        self.ingredients = create_ingredients(5)
+        self.cooks = []
+
+    def add_rows(self, count):
+        cook = create_user(len(self.cooks))
+        self.cooks.append(cook)
+        recipes = create_recipes(count, cook, self.tags, self.ingredients)
+        for user in (self.admin, *self.cooks):
+            FavoriteRecipe.objects.add(user, recipes)
+            ShoppingCart.objects.add(user, recipes)
+
+    def changelist_queries(self, model, per_page):
+        model_admin = admin.site._registry[model]
+        url = reverse(
+            f'admin:{model._meta.app_label}_{model._meta.model_name}'
+            f'_changelist'
+        )
+        default = model_admin.list_per_page
+        model_admin.list_per_page = per_page
+        try:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+        finally:
+            model_admin.list_per_page = default
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_queries_do_not_grow_with_rows_or_page_size(self):
+        self.add_rows(2)
+        expected = {
+            model: self.changelist_queries(model, 100)
+            for model in self.models
+        }
+        self.add_rows(30)
+        for model in self.models:
+            for per_page in (10, 100):
+                with self.subTest(model=model.__name__, per_page=per_page):
+                    with self.assertNumQueries(expected[model]):
+                        self.changelist_queries(model, per_page)
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+
+from foodgram.db_router import (PrimaryReplicaRouter, ReplicaHealth,
+                                fall_back_to_primary, replica_health,
+                                use_primary)
+from foodgram.middleware import ReplicaPinMiddleware
+from recipes.models import Recipe, Tag
+
+from .utils import create_tags
+
+REPLICA = 'replica_1'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class RouterTest(SimpleTestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        patcher = mock.patch.object(
+            replica_health, 'is_available', return_value=True
+        )
+        self.is_available = patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+    def db_for_read(self):
+        return self.router.db_for_read(Recipe)
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.db_for_read(), REPLICA)
+        self.assertEqual(self.router.db_for_write(Recipe), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_go_to_the_primary_without_replicas(self):
+        self.assertEqual(self.db_for_read(), DEFAULT_DB_ALIAS)
+
+    def test_reads_go_to_the_primary_without_available_replicas(self):
+        self.is_available.return_value = False
+        self.assertEqual(self.db_for_read(), DEFAULT_DB_ALIAS)
+
+    def test_use_primary_pins_reads(self):
+        with use_primary():
+            with use_primary():
+                self.assertEqual(self.db_for_read(), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.db_for_read(), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.db_for_read(), REPLICA)
+
+    def test_writes_pin_the_client(self):
+        routed = []
+
+        def get_response(request):
+            routed.append(self.db_for_read())
+            status = 201 if request.method == 'POST' else 200
+            return HttpResponse(status=status)
+
+        middleware = ReplicaPinMiddleware(get_response)
+        factory = RequestFactory()
+        token = {'HTTP_AUTHORIZATION': 'Token 1'}
+        middleware(factory.get('/', **token))
+        middleware(factory.post('/', **token))
+        middleware(factory.get('/', **token))
+        middleware(factory.get('/', HTTP_AUTHORIZATION='Token 2'))
+        self.assertEqual(
+            routed, [REPLICA, DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS, REPLICA]
+        )
+
+
+class ReplicaHealthTest(SimpleTestCase):
+
+    def test_unreachable_replica_is_not_available(self):
+        health = ReplicaHealth()
+        with mock.patch.object(health, 'check', return_value=True):
+            with mock.patch('foodgram.db_router.connections') as connections:
+                connection = connections.__getitem__.return_value
+                connection.ensure_connection.side_effect = OperationalError
+                self.assertFalse(health.is_available(REPLICA))
+                self.assertFalse(health.is_healthy(REPLICA))
+
+
+class FallBackToPrimaryTest(TestCase):
+
+    def setUp(self):
+        create_tags()
+        self.replica = mock.Mock(alias=REPLICA)
+        self.replica.is_usable.return_value = False
+        self.context = {
+            'connection': self.replica, 'cursor': SimpleNamespace(),
+        }
+        self.addCleanup(replica_health._status.pop, REPLICA, None)
+
+    def fail(self, sql, params, many, context):
+        raise OperationalError('server closed the connection unexpectedly')
+
+    def test_lost_replica_read_runs_on_the_primary(self):
+        sql = 'SELECT slug FROM recipes_tag ORDER BY slug'
+        fall_back_to_primary(self.fail, sql, (), False, self.context)
+        self.assertEqual(
+            self.context['cursor'].cursor.fetchall(),
+            list(Tag.objects.order_by('slug').values_list('slug')),
+        )
+        self.assertFalse(replica_health.is_healthy(REPLICA))
+        self.replica.close.assert_called_once_with()
+
+    def test_other_errors_are_raised(self):
+        self.replica.is_usable.return_value = True
+        with self.assertRaises(OperationalError):
+            fall_back_to_primary(
+                self.fail, 'SELECT 1', (), False, self.context
+            )
+        self.assertNotIn(REPLICA, replica_health._status)
+
+    def test_reads_in_transactions_stay_on_the_primary(self):
+        with override_settings(DATABASE_REPLICAS=[REPLICA]):
+            with transaction.atomic():
+                self.assertEqual(
+                    PrimaryReplicaRouter().db_for_read(Recipe),
+                    DEFAULT_DB_ALIAS,
+                )
@@ -0,0 +1,31 @@
+from django.test import TestCase
+
+from api.filters import RECIPE_IDS_MAX
+
+from .utils import create_ingredients, create_recipes, create_tags, create_user
+
+
+class RecipeIdsFilterTest(TestCase):
+
+    def setUp(self):
+        self.recipes = create_recipes(
+            3, create_user(0), create_tags(), create_ingredients(1)
+        )
+
+    def get(self, ids):
+        return self.client.get(
+            '/api/recipes/', {'ids': ','.join(map(str, ids))}
+        )
+
+    def test_recipes_come_in_the_order_of_ids(self):
+        ids = [recipe.id for recipe in reversed(self.recipes)]
+        response = self.get(ids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']], ids
+        )
+
+    def test_too_many_ids_are_rejected(self):
+        ids = range(1, RECIPE_IDS_MAX + 2)
+        self.assertEqual(self.get(ids).status_code, 400)
+        self.assertEqual(self.get(ids[:-1]).status_code, 200)
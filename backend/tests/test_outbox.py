@@ -0,0 +1,90 @@
+from django.test import TestCase, override_settings
+
+from outbox.models import ChangeEvent, Checkpoint
+from outbox.registry import Consumer
+
+from .utils import create_tags
+
+
+class TagConsumer(Consumer):
+
+    name = 'test_tags'
+    entities = ['recipes.tag']
+
+    def __init__(self):
+        self.events = []
+
+    def handle(self, events):
+        self.events.extend(
+            (event.action, event.object_id) for event in events
+        )
+
+    def reset(self):
+        self.events = []
+
+
+class OutboxTest(TestCase):
+
+    def setUp(self):
+        self.breakfast, self.lunch = create_tags()
+        self.consumer = TagConsumer()
+
+    def test_saves_and_deletes_record_events(self):
+        self.breakfast.name = 'Поздний завтрак'
+        self.breakfast.save()
+        pk = self.lunch.pk
+        self.lunch.delete()
+        self.assertEqual(
+            list(ChangeEvent.objects.filter(entity='recipes.tag').order_by(
+                'id'
+            ).values_list('action', 'object_id')),
+            [
+                (ChangeEvent.CREATED, self.breakfast.pk),
+                (ChangeEvent.CREATED, pk),
+                (ChangeEvent.UPDATED, self.breakfast.pk),
+                (ChangeEvent.DELETED, pk),
+            ],
+        )
+
+    def test_events_are_handed_out_once_in_batches(self):
+        self.assertEqual(Checkpoint.consume(self.consumer, batch_size=1), 1)
+        self.assertEqual(Checkpoint.consume(self.consumer, batch_size=1), 1)
+        self.assertEqual(Checkpoint.consume(self.consumer), 0)
+        pk = self.lunch.pk
+        self.lunch.delete()
+        self.assertEqual(Checkpoint.consume(self.consumer), 1)
+        self.assertEqual(self.consumer.events, [
+            (ChangeEvent.CREATED, self.breakfast.pk),
+            (ChangeEvent.CREATED, pk),
+            (ChangeEvent.DELETED, pk),
+        ])
+
+    def test_other_entities_are_skipped(self):
+        self.consumer.entities = ['recipes.recipe']
+        self.assertEqual(Checkpoint.consume(self.consumer), 0)
+        checkpoint = Checkpoint.objects.get(consumer=self.consumer.name)
+        self.assertEqual(checkpoint.position, 0)
+
+    def test_replay_starts_over(self):
+        Checkpoint.consume(self.consumer)
+        Checkpoint.replay(self.consumer)
+        self.assertEqual(self.consumer.events, [])
+        self.assertEqual(Checkpoint.consume(self.consumer), 2)
+        self.assertEqual(
+            [pk for _action, pk in self.consumer.events],
+            [self.breakfast.pk, self.lunch.pk],
+        )
+
+    @override_settings(OUTBOX_RETENTION_DAYS=0)
+    def test_prune_keeps_events_a_consumer_has_not_handled(self):
+        Checkpoint.consume(self.consumer, batch_size=1)
+        Checkpoint.objects.create(consumer='other', position=0)
+        self.assertEqual(Checkpoint.prune(), 0)
+        Checkpoint.objects.filter(consumer='other').delete()
+        self.assertEqual(Checkpoint.prune(), 1)
+        self.assertFalse(
+            ChangeEvent.objects.filter(object_id=self.breakfast.pk).exists()
+        )
+        self.assertTrue(
+            ChangeEvent.objects.filter(object_id=self.lunch.pk).exists()
+        )
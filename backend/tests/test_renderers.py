@@ -0,0 +1,52 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+
+class FastJSONTest(TestCase):
+
+    def test_renders_like_json_renderer(self):
+        data = {
+            'name': 'Борщ\u2028',
+            'amount': Decimal('1.50'),
+            'date': datetime.date(2021, 11, 1),
+            'tags': [1, 2],
+        }
+        rendered = FastJSONRenderer().render(data, 'application/json')
+        self.assertIsInstance(rendered, bytes)
+        self.assertNotIn('\u2028'.encode(), rendered)
+        self.assertEqual(
+            json.loads(rendered),
+            json.loads(JSONRenderer().render(data, 'application/json')),
+        )
+
+    def test_parses_utf8_and_rejects_invalid_json(self):
+        parser = FastJSONParser()
+        body = json.dumps({'name': 'Борщ'}, ensure_ascii=False).encode()
+        self.assertEqual(parser.parse(io.BytesIO(body)), {'name': 'Борщ'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"name": '))
+
+    def test_api_round_trip(self):
+        client = APIClient()
+        response = client.post('/api/users/', {
+            'email': 'cook@example.com', 'username': 'cook',
+            'first_name': 'Иван', 'last_name': 'Петров',
+            'password': 'secret-password',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['first_name'], 'Иван')
+        response = client.post(
+            '/api/users/', '{"email": ', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from recipes.models import (FavoriteRecipe, RecipeActivity, RecipeScore,
+                            ShoppingCart)
+
+from .utils import create_recipes, create_tags, create_user
+
+
+@override_settings(CATALOG_SNAPSHOT_PATH='')
+class ComputeRecipeScoresTest(TestCase):
+
+    def setUp(self):
+        self.cooks = [create_user(number) for number in range(3)]
+        self.first, self.second, self.third = create_recipes(
+            3, self.cooks[0], create_tags(), []
+        )
+
+    def compute(self):
+        call_command('compute_recipe_scores', stdout=StringIO())
+        return {
+            score.recipe_id: score for score in RecipeScore.objects.all()
+        }
+
+    def test_scores_count_activity_by_period(self):
+        for cook in self.cooks:
+            FavoriteRecipe.objects.create(user=cook, recipe=self.first)
+            RecipeActivity.record(cook, [self.first], RecipeActivity.FAVORITE)
+        ShoppingCart.objects.create(user=self.cooks[0], recipe=self.second)
+        RecipeActivity.record(
+            self.cooks[0], [self.second], RecipeActivity.SHOPPING_CART
+        )
+        RecipeActivity.objects.filter(user=self.cooks[2]).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        RecipeActivity.objects.filter(user=self.cooks[1]).update(
+            created=timezone.now() - timedelta(days=8)
+        )
+
+        scores = self.compute()
+        first, second, third = (
+            scores[recipe.pk]
+            for recipe in (self.first, self.second, self.third)
+        )
+        self.assertEqual(
+            (first.favorites_day, first.favorites_week,
+             first.favorites_total, first.popular, first.trending),
+            (1, 2, 3, 3, 6),
+        )
+        self.assertEqual(
+            (second.carts_day, second.carts_total, second.popular,
+             second.trending),
+            (1, 1, 1, 5),
+        )
+        self.assertEqual((third.popular, third.trending), (0, 0))
+        self.assertEqual(RecipeActivity.objects.count(), 3)
+
+    def test_scores_are_updated_in_place(self):
+        self.compute()
+        FavoriteRecipe.objects.create(user=self.cooks[1], recipe=self.third)
+        pk = self.second.pk
+        self.second.delete()
+        scores = self.compute()
+        self.assertNotIn(pk, scores)
+        self.assertEqual(scores[self.third.pk].popular, 1)
+        self.assertEqual(len(scores), 2)
@@ -0,0 +1,75 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.serializers import RecipeSerializer
+from api.views import RecipeDetail
+from recipes.models import FavoriteRecipe, ShoppingCart, Subscribe
+
+from .utils import create_ingredients, create_recipes, create_tags, create_user
+
+
+class RecipeValuesSerializerTest(TestCase):
+    """List and detail responses match RecipeSerializer field for field."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        followed, other = create_user('followed'), create_user('other')
+        tags, ingredients = create_tags(), create_ingredients(3)
+        cls.recipes = [
+            *create_recipes(3, followed, tags, ingredients),
+            *create_recipes(2, other, tags[1:], ingredients[:1]),
+        ]
+        Subscribe.objects.create(follower=cls.user, following=followed)
+        FavoriteRecipe.objects.add(cls.user, cls.recipes[:2])
+        ShoppingCart.objects.add(cls.user, cls.recipes[1:4])
+
+    def expected(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        view = RecipeDetail(request=request, kwargs={}, format_kwarg=None)
+        return {
+            recipe.id: json.loads(JSONRenderer().render(RecipeSerializer(
+                recipe, context={'request': request}
+            ).data))
+            for recipe in view.get_queryset()
+        }
+
+    def assert_parity(self, client, user):
+        expected = self.expected(user)
+        response = client.get('/api/recipes/', {'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), len(self.recipes))
+        for recipe in results:
+            with self.subTest(recipe=recipe['id'], view='list'):
+                self.assertEqual(recipe, expected[recipe['id']])
+        for recipe in self.recipes:
+            with self.subTest(recipe=recipe.id, view='detail'):
+                response = client.get(f'/api/recipes/{recipe.id}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected[recipe.id])
+
+    def test_anonymous(self):
+        self.assert_parity(APIClient(), AnonymousUser())
+
+    def test_authenticated(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assert_parity(client, self.user)
+        flags = {
+            recipe['id']: (
+                recipe['is_favorited'], recipe['is_in_shopping_cart'],
+                recipe['author']['is_subscribed'],
+            )
+            for recipe in self.expected(self.user).values()
+        }
+        self.assertEqual([flags[recipe.id] for recipe in self.recipes], [
+            (True, False, True), (True, True, True), (False, True, True),
+            (False, True, False), (False, False, False),
+        ])
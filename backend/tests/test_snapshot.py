@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import RecipeScore
+from recipes.snapshot import _state, build_snapshot, get_snapshot
+
+from .utils import create_ingredients, create_recipes, create_tags, create_user
+
+
+class SnapshotRankingTest(TestCase):
+    """?ordering=popular pages the same from the snapshot and the table."""
+
+    scores = (5, 5, 5, 3, 3, 1, 0, 0)
+
+    @classmethod
+    def setUpTestData(cls):
+        recipes = create_recipes(
+            len(cls.scores), create_user(0), create_tags(),
+            create_ingredients(2),
+        )
+        for recipe, score in zip(recipes, cls.scores):
+            RecipeScore.objects.create(
+                recipe=recipe, popular=score, trending=-score
+            )
+
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = directory / 'catalog.bin'
+        self.client = APIClient()
+
+    def settings_for(self, snapshot):
+        if snapshot and not self.path.exists():
+            build_snapshot(self.path)
+        return override_settings(
+            CATALOG_SNAPSHOT_PATH=self.path if snapshot else None,
+            CATALOG_SNAPSHOT_CHECK_INTERVAL=0,
+        )
+
+    def get(self, url, snapshot):
+        with self.settings_for(snapshot):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def pages(self, ordering, sources):
+        url = f'/api/recipes/?ordering={ordering}&limit=2'
+        pages = []
+        for snapshot in sources:
+            page = self.get(url, snapshot)
+            pages.append([recipe['id'] for recipe in page['results']])
+            url = page['next']
+            if url is None:
+                break
+        return pages
+
+    def test_pages_match_the_table(self):
+        for ordering in RecipeScore.RANKINGS:
+            with self.subTest(ordering=ordering):
+                expected = self.pages(ordering, [False] * 10)
+                self.assertEqual(len(expected), 4)
+                self.assertEqual(self.pages(ordering, [True] * 10), expected)
+                self.assertEqual(
+                    self.pages(ordering, [True, False] * 5), expected
+                )
+
+    def test_previous_pages_match_the_table(self):
+        first = self.get('/api/recipes/?ordering=popular&limit=3', True)
+        second = self.get(first['next'], True)
+        self.assertEqual(self.get(second['previous'], True), first)
+        self.assertEqual(self.get(second['previous'], False), first)
+
+    def score_table_read(self, url):
+        with self.settings_for(True):
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(url)
+        return 'recipes_recipescore' in ' '.join(
+            query['sql'] for query in context
+        )
+
+    def test_ranking_is_read_from_the_snapshot(self):
+        self.assertFalse(
+            self.score_table_read('/api/recipes/?ordering=popular')
+        )
+
+    def test_filters_read_the_table(self):
+        self.assertTrue(
+            self.score_table_read('/api/recipes/?ordering=popular&tags=lunch')
+        )
+
+
+@override_settings(CATALOG_SNAPSHOT_CHECK_INTERVAL=0)
+class BrokenSnapshotTest(TestCase):
+    """A corrupt file keeps the previous map or falls back to the table."""
+
+    def setUp(self):
+        recipes = create_recipes(
+            2, create_user(0), create_tags(), create_ingredients(2)
+        )
+        for score, recipe in enumerate(recipes):
+            RecipeScore.objects.create(
+                recipe=recipe, popular=score, trending=score
+            )
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = directory / 'catalog.bin'
+        build_snapshot(self.path)
+        self.contents = self.path.read_bytes()
+        patcher = mock.patch.dict(
+            _state, {'snapshot': None, 'checked': None, 'rejected': None}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def replace(self, contents):
+        new = self.path.with_suffix('.new')
+        new.write_bytes(contents)
+        os.replace(new, self.path)
+
+    def get_snapshot(self):
+        with self.settings(CATALOG_SNAPSHOT_PATH=self.path):
+            with self.assertLogs('recipes.snapshot', 'ERROR'):
+                return get_snapshot()
+
+    def test_previous_snapshot_is_kept(self):
+        with self.settings(CATALOG_SNAPSHOT_PATH=self.path):
+            current = get_snapshot()
+        self.assertIsNotNone(current)
+        self.replace(self.contents[:len(self.contents) // 2])
+        self.assertIs(self.get_snapshot(), current)
+
+    def test_broken_files_are_not_used(self):
+        truncated = self.contents[:len(self.contents) // 2]
+        for contents in (b'', b'FGCATLG1', b'not a snapshot', truncated):
+            with self.subTest(size=len(contents)):
+                _state.update(snapshot=None, rejected=None)
+                self.replace(contents)
+                self.assertIsNone(self.get_snapshot())
+
+    def test_api_reads_the_table(self):
+        url = '/api/recipes/?ordering=popular'
+        with self.settings(CATALOG_SNAPSHOT_PATH=None):
+            expected = self.client.get(url).json()
+        self.assertEqual(len(expected['results']), 2)
+        self.replace(b'not a snapshot')
+        with self.settings(CATALOG_SNAPSHOT_PATH=self.path):
+            with self.assertLogs('recipes.snapshot', 'ERROR'):
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
@@ -0,0 +1,35 @@
+from django.test import TestCase, override_settings
+
+from recipes.models import Recipe, Tag
+
+from .utils import create_recipes, create_tags, create_user
+
+
+class TagBitTest(TestCase):
+
+    def setUp(self):
+        self.breakfast, self.lunch = create_tags()
+        self.recipe, = create_recipes(
+            1, create_user(0), [self.breakfast], []
+        )
+
+    def create_tag(self):
+        return Tag.objects.create(name='Ужин', color='#8775D2', slug='dinner')
+
+    def test_deleted_bit_is_not_reused_while_catalogs_may_be_stale(self):
+        bit = self.breakfast.bit
+        self.breakfast.delete()
+        self.assertEqual(Recipe.objects.get().tag_mask, 0)
+        self.assertNotIn(self.create_tag().bit, (bit, self.lunch.bit))
+
+    @override_settings(TAG_CATALOG_TIMEOUT=0)
+    def test_deleted_bit_is_reused_once_catalogs_expired(self):
+        bit = self.breakfast.bit
+        self.breakfast.delete()
+        self.assertEqual(self.create_tag().bit, bit)
+
+    def test_mask_follows_the_catalog(self):
+        self.assertEqual(
+            Tag.mask(['breakfast', 'lunch', 'unknown']),
+            1 << self.breakfast.bit | 1 << self.lunch.bit,
+        )
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+
+def create_user(number):
+    return User.objects.create_user(
+        email=f'cook{number}@example.com', username=f'cook{number}',
+        first_name='Иван', last_name='Петров', password='secret-password',
+    )
+
+
+def create_tags():
+    return [
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast'),
+        Tag.objects.create(name='Обед', color='#49B64E', slug='lunch'),
+    ]
+
+
+def create_ingredients(count):
+    return [
+        Ingredient.objects.create(
+            name=f'ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(count)
+    ]
+
+
+def create_recipes(count, author, tags, ingredients):
+    recipes = []
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {number}',
+            image=f'recipe/{number}.png', text='Смешать и запечь.',
+            cooking_time=number + 1,
+        )
+        recipe.tags.set(tags[:number % len(tags) + 1])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredient, amount=index + 1
+            )
+            for index, ingredient in enumerate(ingredients)
+        )
+        recipes.append(recipe)
+    return recipes
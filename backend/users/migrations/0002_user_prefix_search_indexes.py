@@ -0,0 +1,40 @@
+# Generated by Django 3.2.9 on 2026-10-19 10:20
+
+from django.db import migrations
+
+PREFIX_INDEXES = (
+    ('users_user_username_upper_like', 'username'),
+    ('users_user_email_upper_like', 'email'),
+)
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # istartswith compiles to UPPER(column::text) LIKE UPPER('term%') on
+    # PostgreSQL, which only a matching pattern_ops expression index serves.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PREFIX_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+            f'ON users_user (UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _column in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]